@@ -1,8 +1,42 @@
 from .constants import ROWS, COLS, SQUARE_SIZE, BLACK, SQUARE_IMG, EMPTY_SQUARE_IMG, PLAYER_RED_IMG, PLAYER_RED_SELECTED_IMG, PLAYER_BLUE_IMG, PLAYER_BLUE_SELECTED_IMG
 
+FULL = (1 << (ROWS * COLS)) - 1
+
+
+def _square_masks(distance):
+    # For each square, the squares at exactly `distance` king steps from it
+    masks = []
+    for row in range(ROWS):
+        for col in range(COLS):
+            mask = 0
+            for i in range(-distance, distance + 1):
+                for j in range(-distance, distance + 1):
+                    if max(abs(i), abs(j)) == distance and 0 <= row + i < ROWS and 0 <= col + j < COLS:
+                        mask |= 1 << ((row + i) * COLS + col + j)
+            masks.append(mask)
+    return masks
+
+
+# Clone targets (and the squares a move captures on), and jump targets
+CLONE_MASKS = _square_masks(1)
+JUMP_MASKS = _square_masks(2)
+
+
+def squares(mask):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
 class Board:
+    # One bitboard per player (1 is blue, -1 is red) and one for the blocked
+    # squares, bit row * COLS + col. `board` is the grid of 1, -1, 0 and '#'
+    # built from them; assign a whole grid to it to change the position.
     def __init__(self):
-        self.board = []
+        self.blue = 0
+        self.red = 0
+        self.blocked = 0
         self.create_boared()
         self.selected_row = None
         self.selected_col = None
@@ -19,86 +53,106 @@ class Board:
                     [-1, 0, 0, 0, 0, 0, 0, -1],
                 ]
 
+    @property
+    def board(self):
+        return [[self.get_piece(row, col) for col in range(COLS)] for row in range(ROWS)]
+
+    @board.setter
+    def board(self, grid):
+        self.blue = self.red = self.blocked = 0
+        for row in range(ROWS):
+            for col in range(COLS):
+                bit = 1 << (row * COLS + col)
+                if grid[row][col] == 1:
+                    self.blue |= bit
+                elif grid[row][col] == -1:
+                    self.red |= bit
+                elif grid[row][col] == '#':
+                    self.blocked |= bit
+
+    def copy(self):
+        board = Board.__new__(Board)
+        board.blue, board.red, board.blocked = self.blue, self.red, self.blocked
+        board.selected_row = self.selected_row
+        board.selected_col = self.selected_col
+        return board
+
+    def empty(self):
+        return ~(self.blue | self.red | self.blocked) & FULL
+
+    def pieces(self, player):
+        return self.blue if player == 1 else self.red
+
     def draw_squares(self, win):
         win.fill(BLACK)
         for row in range(ROWS):
             for col in range(COLS):
-                if self.board[row][col] != '#':
+                if not self.blocked >> (row * COLS + col) & 1:
                     win.blit(SQUARE_IMG, (row * SQUARE_SIZE, col * SQUARE_SIZE))
                 else:
                     win.blit(EMPTY_SQUARE_IMG, (row * SQUARE_SIZE, col * SQUARE_SIZE))
 
     def move(self, old_row, old_col, new_row, new_col, moveType):
-        if self.board[new_row][new_col] == 0:
-            self.board[new_row][new_col] = self.board[old_row][old_col]
-            if moveType == 2:
-                self.board[old_row][old_col] = 0
-            for i in range(-1, 2):
-                for j in range(-1, 2):
-                    if 0 <= new_row + i < ROWS and 0 <= new_col + j < COLS:
-                        if self.board[new_row + i][new_col + j] != 0 and self.board[new_row + i][new_col + j] != '#':
-                            self.board[new_row + i][new_col + j] = self.board[new_row][new_col]
+        old = old_row * COLS + old_col
+        new = new_row * COLS + new_col
+        if not self.empty() >> new & 1 or not (self.blue | self.red) >> old & 1:
+            return
+        player = 1 if self.blue >> old & 1 else -1
+        mine = self.pieces(player) | 1 << new
+        if moveType == 2:
+            mine ^= 1 << old
+        # Every opponent piece next to the landing square changes sides
+        captured = CLONE_MASKS[new] & self.pieces(-player)
+        mine |= captured
+        theirs = self.pieces(-player) ^ captured
+        if player == 1:
+            self.blue, self.red = mine, theirs
+        else:
+            self.red, self.blue = mine, theirs
 
     def get_piece(self, row, col):
         if row >= ROWS or row < 0 or col >= COLS or col < 0:
             return 0
-        return self.board[row][col]
+        square = row * COLS + col
+        if self.blue >> square & 1:
+            return 1
+        if self.red >> square & 1:
+            return -1
+        if self.blocked >> square & 1:
+            return '#'
+        return 0
 
     def draw(self, win):
         self.draw_squares(win)
-        for row in range(ROWS):
-            for col in range(COLS):
-                piece = self.board[row][col]
-                if piece != 0 and piece != '#':
-                    x = SQUARE_SIZE * col + SQUARE_SIZE // 2
-                    y = SQUARE_SIZE * row + SQUARE_SIZE // 2
-                    if piece == 1:
-                        if row == self.selected_row and col == self.selected_col:
-                            img = PLAYER_BLUE_SELECTED_IMG
-                        else:
-                            img = PLAYER_BLUE_IMG
-                    elif piece == -1:
-                        if row == self.selected_row and col == self.selected_col:
-                            img = PLAYER_RED_SELECTED_IMG
-                        else:
-                            img = PLAYER_RED_IMG
-                    if img:
-                        win.blit(img, (x - img.get_width()//2, y - img.get_height()//2))
+        for player, mask in ((1, self.blue), (-1, self.red)):
+            for square in squares(mask):
+                row, col = divmod(square, COLS)
+                x = SQUARE_SIZE * col + SQUARE_SIZE // 2
+                y = SQUARE_SIZE * row + SQUARE_SIZE // 2
+                selected = row == self.selected_row and col == self.selected_col
+                if player == 1:
+                    img = PLAYER_BLUE_SELECTED_IMG if selected else PLAYER_BLUE_IMG
+                else:
+                    img = PLAYER_RED_SELECTED_IMG if selected else PLAYER_RED_IMG
+                win.blit(img, (x - img.get_width()//2, y - img.get_height()//2))
 
     def get_valid_moves(self, row, col):
+        square = row * COLS + col
+        empty = self.empty()
         moves = {}
-        for i in range(-1, 2):
-            for j in range(-1, 2):
-                if 0 <= row + i < ROWS and 0 <= col + j < COLS:
-                    if self.board[row + i][col + j] == 0:
-                        moves[(row + i, col + j)] = 1
-        for i in range(-2, 3):
-            for j in range(-2, 3):
-                if 0 <= row + i < ROWS and 0 <= col + j < COLS and (row + i, col + j) not in moves:
-                    if self.board[row + i][col + j] == 0:
-                        moves[(row + i, col + j)] = 2
+        for target in squares(CLONE_MASKS[square] & empty):
+            moves[divmod(target, COLS)] = 1
+        for target in squares(JUMP_MASKS[square] & empty):
+            moves[divmod(target, COLS)] = 2
         return moves
 
     def winner(self):
-        redFfownd = False
-        blueFownd = False
-        emptyFownd = False
-        sum = 0
-        for row in range(ROWS):
-            for col in range(COLS):
-                if self.board[row][col] == -1:
-                    redFfownd = True
-                if self.board[row][col] == 1:
-                    blueFownd = True
-                if self.board[row][col] == 0:
-                    emptyFownd = True
-                if self.board[row][col] != '#':
-                    sum += self.board[row][col]
-        if not redFfownd:
+        if not self.red:
             return 1
-        if not blueFownd:
+        if not self.blue:
             return -1
-        if not emptyFownd:
+        if not self.empty():
+            sum = self.evaluate()
             if sum > 0:
                 return 1
             elif sum < 0:
@@ -108,11 +162,4 @@ class Board:
         return 0
 
     def evaluate(self):
-        sum = 0
-        for row in range(ROWS):
-            for col in range(COLS):
-                if self.board[row][col] != '#':
-                    sum += self.board[row][col]
-        return sum
-
-
+        return bin(self.blue).count('1') - bin(self.red).count('1')
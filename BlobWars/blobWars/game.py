@@ -1,7 +1,6 @@
 import pygame
-from .board import Board
+from .board import Board, squares
 from .constants import BLACK, WHITE, SQUARE_SIZE, BLUE, RED, ROWS, COLS, LEVEL
-from copy import deepcopy
 from blobWars.ai import AI
 
 class Game:
@@ -76,15 +75,14 @@ class Game:
 
     def get_all_moves(self, board, player):
         boards = []
-        for row in range(ROWS):
-            for col in range(COLS):
-                if board.board[row][col] == player:
-                    moves = board.get_valid_moves(row, col)
-                    for move in moves:
-                        x, y = move
-                        temp_board = deepcopy(board)
-                        temp_board.move(row, col, x, y, moves[(x, y)])
-                        boards.append(temp_board)
+        for square in squares(board.pieces(player)):
+            row, col = divmod(square, COLS)
+            moves = board.get_valid_moves(row, col)
+            for move in moves:
+                x, y = move
+                temp_board = board.copy()
+                temp_board.move(row, col, x, y, moves[(x, y)])
+                boards.append(temp_board)
         return boards
 
     def ai_move(self):
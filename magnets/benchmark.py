@@ -0,0 +1,142 @@
+# magnets/benchmark.py
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+from .board import GameState
+from .instrumentation import SearchStats
+from .levels import load_levels
+from .solvers import SOLVERS
+
+DEFAULT_PACK = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'levels', 'pack')
+
+DEFAULT_SOLVERS = ['bfs', 'dfs', 'ucs', 'astar', 'hill']
+
+
+def run_solver(board, solver, memory=True):
+    """
+    Solve one level with one solver and measure it. The timed run and the
+    peak memory run are separate, since tracing allocations slows the solver
+    down a lot.
+    """
+    stats = SearchStats()
+    start = time.perf_counter()
+    moves = SOLVERS[solver](GameState(board.copy()), stats=stats)
+    elapsed = time.perf_counter() - start
+    result = {
+        'solver': solver,
+        'solved': moves is not None,
+        'length': len(moves) if moves is not None else None,
+        'time': elapsed,
+        'nodes_expanded': stats.nodes_expanded,
+        'nodes_generated': stats.nodes_generated,
+        'peak_memory': None,
+    }
+    if memory:
+        tracemalloc.start()
+        try:
+            SOLVERS[solver](GameState(board.copy()))
+            result['peak_memory'] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def run_benchmark(levels, solvers, memory=True, progress=None):
+    results = []
+    for name, board in levels:
+        for solver in solvers:
+            result = {'level': name}
+            result.update(run_solver(board, solver, memory))
+            results.append(result)
+            if progress:
+                progress(result)
+    return {
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+        'summary': summarize(results),
+    }
+
+
+def summarize(results):
+    summary = {}
+    for result in results:
+        entry = summary.setdefault(result['solver'], {'levels': 0, 'solved': 0, 'time': 0.0, 'nodes_expanded': 0})
+        entry['levels'] += 1
+        entry['solved'] += result['solved']
+        entry['time'] += result['time']
+        entry['nodes_expanded'] += result['nodes_expanded']
+    return summary
+
+
+def compare(report, baseline, tolerance=0.25):
+    """
+    Regressions of report against a baseline report: a level a solver no
+    longer solves, a longer solution, more nodes expanded, or more than
+    `tolerance` (as a fraction) extra time or peak memory.
+    """
+    old_results = {(result['level'], result['solver']): result for result in baseline['results']}
+    regressions = []
+    for result in report['results']:
+        old = old_results.get((result['level'], result['solver']))
+        if old is None:
+            continue
+        where = f"{result['level']} / {result['solver']}"
+        if old['solved'] and not result['solved']:
+            regressions.append(f"{where}: no longer solved")
+            continue
+        if result['solved'] and old['solved'] and result['length'] > old['length']:
+            regressions.append(f"{where}: solution length {old['length']} -> {result['length']}")
+        if result['nodes_expanded'] > old['nodes_expanded']:
+            regressions.append(f"{where}: nodes expanded {old['nodes_expanded']} -> {result['nodes_expanded']}")
+        if result['time'] > old['time'] * (1 + tolerance):
+            regressions.append(f"{where}: time {old['time']:.4f}s -> {result['time']:.4f}s")
+        if result['peak_memory'] and old['peak_memory'] and result['peak_memory'] > old['peak_memory'] * (1 + tolerance):
+            regressions.append(f"{where}: peak memory {old['peak_memory']} -> {result['peak_memory']} bytes")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m magnets.benchmark', description="Benchmark the solvers over a level pack.")
+    parser.add_argument('paths', nargs='*', default=[DEFAULT_PACK], help="level files or pack directories (default: levels/pack)")
+    parser.add_argument('-s', '--solvers', nargs='+', choices=sorted(SOLVERS), default=DEFAULT_SOLVERS)
+    parser.add_argument('-o', '--output', metavar='FILE', help="write the JSON report to FILE")
+    parser.add_argument('--no-memory', action='store_true', help="skip the peak memory runs")
+    parser.add_argument('--baseline', metavar='FILE', help="compare with an earlier report and fail on regressions")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed extra time/memory against the baseline (default: 0.25)")
+    args = parser.parse_args(argv)
+
+    levels = []
+    for path in args.paths:
+        levels.extend(load_levels(path))
+
+    def progress(result):
+        memory = f"{result['peak_memory'] / 1024:.0f} KiB" if result['peak_memory'] is not None else "-"
+        print(f"{result['level']:<16} {result['solver']:<8} length={result['length']} "
+              f"time={result['time']:.4f}s nodes={result['nodes_expanded']} memory={memory}", file=sys.stderr)
+
+    report = run_benchmark(levels, args.solvers, memory=not args.no_memory, progress=progress)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
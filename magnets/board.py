@@ -0,0 +1,258 @@
+# magnets/board.py
+import random
+
+PIECE_TYPES = ['Red', 'Purple', 'Gray']
+
+# Zobrist keys by board size: a random 64-bit key per piece type and cell
+_zobrist_keys = {}
+
+
+def zobrist_keys(size):
+    keys = _zobrist_keys.get(size)
+    if keys is None:
+        # Seeded, so hashes are the same in every process
+        rng = random.Random(size)
+        keys = _zobrist_keys[size] = {piece_type: [rng.getrandbits(64) for _ in range(size)] for piece_type in PIECE_TYPES}
+    return keys
+
+
+class Piece:
+    def __init__(self, piece_type, position):
+        self.piece_type = piece_type  
+        self.position = position 
+
+    def __repr__(self):
+        return f"{self.piece_type[0]}({self.position})"
+
+    def copy(self):
+        return Piece(self.piece_type, self.position)
+
+class GameState:
+    def __init__(self, board):
+        self.board = board
+
+    def display(self):
+        self.board.display()
+
+    def is_final_state(self):
+        return self.board.is_final_state()
+
+    def make_move(self, piece, new_position):
+        new_board = self.board.copy()
+        # Move the copy's piece; moving `piece` itself would mutate this state's board
+        new_board.make_move(new_board.pieces[piece.position], new_position)
+        return GameState(new_board)
+
+def move_notation(piece_type, old_position, new_position):
+    # Same notation as the GUI move log, e.g. "R(2, 3) to (2, 1)"
+    return f"{piece_type[0]}({old_position[0]}, {old_position[1]}) to ({new_position[0]}, {new_position[1]})"
+
+def state_key(state):
+    # 64-bit Zobrist hash of the position, kept up to date by the board; use
+    # state.board.key where collisions must be ruled out
+    return state.board.zobrist
+
+class Board:
+    def __init__(self, n, m, pieces, targets):
+        self.n = n  
+        self.m = m  
+        self.grid = [[' ' for _ in range(m)] for _ in range(n)]
+        self.pieces = {piece.position: piece for piece in pieces}  
+        self.targets = targets 
+        self.initial_pieces = pieces 
+        self.initialize_board()
+
+    def initialize_board(self):
+        self.grid = [[' ' for _ in range(self.m)] for _ in range(self.n)]
+        self.pieces = {piece.position: piece for piece in self.initial_pieces}  
+        for piece in self.pieces.values():
+            row, col = piece.position
+            self.grid[row][col] = piece.piece_type[0]
+        for row, col in self.targets:
+            if self.grid[row][col] == ' ':
+                self.grid[row][col] = 'T'
+        # Bitmask of the empty cells (bit row * m + col), kept up to date by
+        # every piece move so move generation never has to scan the grid
+        self.full_mask = (1 << (self.n * self.m)) - 1
+        self.free_mask = self.full_mask
+        for row, col in self.pieces:
+            self.free_mask &= ~self._cell_bit(row, col)
+        self.targets_mask = 0
+        for row, col in self.targets:
+            self.targets_mask |= self._cell_bit(row, col)
+        self._free_positions = None
+        self._free_positions_mask = None
+        # Packed position of the pieces (the same int PackedLevel.pack builds),
+        # also kept up to date as pieces move
+        size = self.n * self.m
+        self._key_offsets = {piece_type: index * size for index, piece_type in enumerate(PIECE_TYPES)}
+        self.key = 0
+        for (row, col), piece in self.pieces.items():
+            self.key |= self._cell_bit(row, col) << self._key_offsets[piece.piece_type]
+        # Zobrist hash: the XOR of the keys of every (piece type, cell), so a
+        # relocation updates it with two XORs
+        self._zobrist_keys = zobrist_keys(size)
+        self.zobrist = 0
+        for (row, col), piece in self.pieces.items():
+            self.zobrist ^= self._zobrist_keys[piece.piece_type][row * self.m + col]
+        # Relocations of the move being applied by apply_move, for undo_move
+        self._journal = None
+
+    def _cell_bit(self, row, col):
+        return 1 << (row * self.m + col)
+
+    def _relocate(self, old_position, new_position, replaced):
+        # Called after a piece moved from old_position to new_position, where
+        # the grid held `replaced` (' ' or 'T') before
+        piece_type = self.pieces[new_position].piece_type
+        old_cell = old_position[0] * self.m + old_position[1]
+        new_cell = new_position[0] * self.m + new_position[1]
+        bits = (1 << old_cell) | (1 << new_cell)
+        self.free_mask ^= bits
+        self.key ^= bits << self._key_offsets[piece_type]
+        keys = self._zobrist_keys[piece_type]
+        self.zobrist ^= keys[old_cell] ^ keys[new_cell]
+        if self._journal is not None:
+            self._journal.append((old_position, new_position, replaced))
+
+    def free_positions(self):
+        # Computed once per board position and shared by every piece
+        if self._free_positions_mask != self.free_mask:
+            positions = []
+            mask = self.free_mask
+            while mask:
+                low = mask & -mask
+                positions.append(divmod(low.bit_length() - 1, self.m))
+                mask ^= low
+            self._free_positions = positions
+            self._free_positions_mask = self.free_mask
+        return self._free_positions
+
+    def display(self):
+        print(self.render())
+
+    def render(self):
+        lines = []
+        for row in self.grid:
+            lines.append(" | ".join(row))
+            lines.append("-" * (self.m * 4 - 1))
+        return "\n".join(lines)
+
+    def can_move_to(self, row, col):
+        return 0 <= row < self.n and 0 <= col < self.m and self.free_mask & self._cell_bit(row, col) != 0
+
+    def move_red_magnet(self, piece, new_position):
+        old_row, old_col = piece.position
+        new_row, new_col = new_position
+        if not self.can_move_to(new_row, new_col):
+            print("Invalid move for Red magnet.")
+            return
+
+        replaced = self.grid[new_row][new_col]
+        self.grid[old_row][old_col] = ' '
+        piece.position = new_position
+        self.grid[new_row][new_col] = 'R'
+        self.pieces[new_position] = piece
+        del self.pieces[(old_row, old_col)]
+        self._relocate((old_row, old_col), new_position, replaced)
+        self._pull_magnets(new_row, new_col)
+
+    def move_purple_magnet(self, piece, new_position):
+        old_row, old_col = piece.position
+        new_row, new_col = new_position
+        if not self.can_move_to(new_row, new_col):
+            print("Invalid move for Purple magnet.")
+            return
+
+        replaced = self.grid[new_row][new_col]
+        self.grid[old_row][old_col] = ' '
+        piece.position = new_position
+        self.grid[new_row][new_col] = 'P'
+        self.pieces[new_position] = piece
+        del self.pieces[(old_row, old_col)]
+        self._relocate((old_row, old_col), new_position, replaced)
+        self._push_magnets(new_row, new_col)
+
+    def _shift_piece(self, row, col, row_offset, col_offset):
+        new_row, new_col = row + row_offset, col + col_offset
+        if self.can_move_to(new_row, new_col):
+            replaced = self.grid[new_row][new_col]
+            self.grid[new_row][new_col] = self.grid[row][col]
+            self.pieces[(new_row, new_col)] = self.pieces[(row, col)]
+            self.pieces[(new_row, new_col)].position = (new_row, new_col)
+            self.grid[row][col] = ' '
+            del self.pieces[(row, col)]
+            self._relocate((row, col), (new_row, new_col), replaced)
+
+    def _pull_magnets(self, row, col):
+        for i in range(1, self.m):
+            left = (row, col - i)
+            if left in self.pieces and col - i + 1 < self.m:
+                self._shift_piece(row, col - i, 0, 1)
+            right = (row, col + i)
+            if right in self.pieces and col + i - 1 >= 0:
+                self._shift_piece(row, col + i, 0, -1)
+        for i in range(1, self.n):
+            up = (row - i, col)
+            if up in self.pieces and row - i + 1 < self.n:
+                self._shift_piece(row - i, col, 1, 0)
+            down = (row + i, col)
+            if down in self.pieces and row + i - 1 >= 0:
+                self._shift_piece(row + i, col, -1, 0)
+
+    def _push_magnets(self, row, col):
+        for i in range(self.m - 1, 0, -1):
+            left = (row, col - i)
+            if left in self.pieces and col - i - 1 >= 0:
+                self._shift_piece(row, col - i, 0, -1)
+            right = (row, col + i)
+            if right in self.pieces and col + i + 1 < self.m:
+                self._shift_piece(row, col + i, 0, 1)
+        for i in range(self.n - 1, 0, -1):
+            up = (row - i, col)
+            if up in self.pieces and row - i - 1 >= 0:
+                self._shift_piece(row - i, col, -1, 0)
+            down = (row + i, col)
+            if down in self.pieces and row + i + 1 < self.n:
+                self._shift_piece(row + i, col, 1, 0)
+
+    def is_final_state(self):
+        # Every occupied cell is a target
+        return ~self.free_mask & self.full_mask & ~self.targets_mask == 0
+
+    def make_move(self, piece, new_position):
+        if piece.piece_type == 'Red':
+            self.move_red_magnet(piece, new_position)
+        elif piece.piece_type == 'Purple':
+            self.move_purple_magnet(piece, new_position)
+
+    def apply_move(self, position, new_position):
+        """
+        Move the piece at position in place and return a record of every
+        relocation the move caused (the magnet itself and all the pieces it
+        pulled or pushed), which undo_move uses to revert it.
+        """
+        self._journal = []
+        try:
+            self.make_move(self.pieces[position], new_position)
+            return self._journal
+        finally:
+            self._journal = None
+
+    def undo_move(self, record):
+        for old_position, new_position, replaced in reversed(record):
+            piece = self.pieces.pop(new_position)
+            piece.position = old_position
+            self.pieces[old_position] = piece
+            self.grid[old_position[0]][old_position[1]] = piece.piece_type[0]
+            self.grid[new_position[0]][new_position[1]] = replaced
+            old_cell = old_position[0] * self.m + old_position[1]
+            new_cell = new_position[0] * self.m + new_position[1]
+            bits = (1 << old_cell) | (1 << new_cell)
+            self.free_mask ^= bits
+            self.key ^= bits << self._key_offsets[piece.piece_type]
+            keys = self._zobrist_keys[piece.piece_type]
+            self.zobrist ^= keys[old_cell] ^ keys[new_cell]
+
+    def copy(self):
+        return Board(self.n, self.m, [piece.copy() for piece in self.pieces.values()], self.targets)
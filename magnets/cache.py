@@ -0,0 +1,231 @@
+# magnets/cache.py
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+
+from .board import GameState
+from .packed import PackedLevel
+from .replay import parse_moves, replay_states
+from .solvers import SOLVERS, OPTIMAL_SOLVERS
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.logic_magnets_cache.sqlite')
+
+# Returned by SolutionCache.get when nothing is stored (None means "no solution")
+MISS = object()
+
+# Solvers that take the stored exact distances as known=
+KNOWN_DISTANCE_SOLVERS = {'astar', 'idastar'}
+
+# Solver options that can change the solution found; they are part of the cache key
+RESULT_OPTIONS = ('width', 'time_limit', 'restarts', 'patience', 'max_depth', 'seed', 'pattern_db')
+
+
+def level_key(board):
+    """
+    Canonical hash of a level: size, pieces and targets, independent of the
+    order the pieces and targets were listed in.
+    """
+    pieces = sorted((piece.piece_type, list(piece.position)) for piece in board.pieces.values())
+    return _hash([board.n, board.m, pieces, sorted(list(target) for target in board.targets)])
+
+
+def targets_key(board):
+    # The states of every level with this size and these targets share one distance table
+    return _hash([board.n, board.m, sorted(list(target) for target in board.targets)])
+
+
+def solver_key(solver, options=None):
+    """
+    The solver name, followed by the options in RESULT_OPTIONS it was run
+    with, e.g. 'beam {"time_limit": 3, "width": 8}'.
+    """
+    options = {name: value for name, value in (options or {}).items() if name in RESULT_OPTIONS and value is not None}
+    if not options:
+        return solver
+    if 'pattern_db' in options:
+        options['pattern_db'] = options['pattern_db'].describe()
+    return f"{solver} {json.dumps(options, sort_keys=True)}"
+
+
+def _hash(data):
+    return hashlib.sha1(json.dumps(data).encode()).hexdigest()
+
+
+class SolutionCache:
+    """
+    Solved move lists, and optionally exact distances to the goal of states,
+    stored in an SQLite file. Solutions are keyed by (level_key, solver_key) and
+    capped at max_solutions entries, distances at max_distances; the least
+    recently used entries are evicted first. Recent solutions are also kept
+    in memory, so a repeated lookup does not touch the database.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_solutions=10000, max_distances=1000000, memory_entries=1024):
+        self.path = path
+        self.max_solutions = max_solutions
+        self.max_distances = max_distances
+        self.memory_entries = memory_entries
+        self.memory = OrderedDict()
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("""CREATE TABLE IF NOT EXISTS solutions (
+            level TEXT, solver TEXT, moves TEXT, last_used REAL, PRIMARY KEY (level, solver))""")
+        self.connection.execute("""CREATE TABLE IF NOT EXISTS distances (
+            level TEXT, state TEXT, distance INTEGER, last_used REAL, PRIMARY KEY (level, state))""")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS solutions_lru ON solutions (last_used)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS distances_lru ON distances (last_used)")
+        self.connection.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def _remember(self, key, moves):
+        self.memory[key] = moves
+        self.memory.move_to_end(key)
+        if len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    def get(self, board, solver, options=None):
+        key = (level_key(board), solver_key(solver, options))
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            return self.memory[key]
+        row = self.connection.execute("SELECT moves FROM solutions WHERE level = ? AND solver = ?", key).fetchone()
+        if row is None:
+            return MISS
+        self.connection.execute("UPDATE solutions SET last_used = ? WHERE level = ? AND solver = ?", (time.time(),) + key)
+        self.connection.commit()
+        moves = json.loads(row[0])
+        self._remember(key, moves)
+        return moves
+
+    def put(self, board, solver, moves, options=None):
+        key = (level_key(board), solver_key(solver, options))
+        self.connection.execute("INSERT OR REPLACE INTO solutions VALUES (?, ?, ?, ?)",
+                                key + (json.dumps(moves), time.time()))
+        self._evict('solutions', self.max_solutions)
+        self.connection.commit()
+        self._remember(key, moves)
+
+    def get_distance(self, board):
+        """
+        Exact number of moves from this board to the goal, or None if unknown.
+        """
+        level, state = targets_key(board), format(PackedLevel.from_board(board)[1], 'x')
+        row = self.connection.execute("SELECT distance FROM distances WHERE level = ? AND state = ?",
+                                      (level, state)).fetchone()
+        if row is None:
+            return None
+        self.connection.execute("UPDATE distances SET last_used = ? WHERE level = ? AND state = ?",
+                                (time.time(), level, state))
+        self.connection.commit()
+        return row[0]
+
+    def known_distances(self, board):
+        """
+        Every stored exact distance of the level family of `board`, for the
+        known= option of a_star_solver and ida_star_solver. Pass the result
+        to touch_distances after the search.
+        """
+        rows = self.connection.execute("SELECT state, distance FROM distances WHERE level = ?", (targets_key(board),))
+        return KnownDistances({int(state, 16): distance for state, distance in rows})
+
+    def touch_distances(self, board, known):
+        # Mark the distances a search used as recently used
+        level, now = targets_key(board), time.time()
+        self.connection.executemany("UPDATE distances SET last_used = ? WHERE level = ? AND state = ?",
+                                    [(now, level, format(state, 'x')) for state in known.used])
+        self.connection.commit()
+
+    def put_distances(self, board, distances):
+        """
+        Store exact distances to the goal, given as {packed state: distance}
+        for states of the level of `board`.
+        """
+        level, now = targets_key(board), time.time()
+        self.connection.executemany("INSERT OR REPLACE INTO distances VALUES (?, ?, ?, ?)",
+                                    [(level, format(state, 'x'), distance, now) for state, distance in distances.items()])
+        self._evict('distances', self.max_distances)
+        self.connection.commit()
+
+    def _evict(self, table, limit):
+        count = self.connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        if count > limit:
+            self.connection.execute(f"DELETE FROM {table} WHERE rowid IN "
+                                    f"(SELECT rowid FROM {table} ORDER BY last_used LIMIT ?)", (count - limit,))
+
+    def clear(self):
+        self.memory.clear()
+        self.connection.execute("DELETE FROM solutions")
+        self.connection.execute("DELETE FROM distances")
+        self.connection.commit()
+
+
+class KnownDistances:
+    """
+    Exact distances to the goal by packed state, as loaded from a
+    SolutionCache; records which states a search looked up successfully.
+    """
+
+    def __init__(self, distances):
+        self.distances = distances
+        self.used = set()
+
+    def __len__(self):
+        return len(self.distances)
+
+    def get(self, state):
+        distance = self.distances.get(state)
+        if distance is not None:
+            self.used.add(state)
+        return distance
+
+
+def path_distances(board, moves):
+    """
+    The packed states along a solution and their distance to the goal. Only
+    exact when the solution is a shortest one.
+    """
+    level, state = PackedLevel.from_board(board)
+    states = replay_states(level, state, parse_moves(moves))
+    return {state: len(moves) - index for index, state in enumerate(states)}
+
+
+def store_solution(cache, board, solver, moves, options=None):
+    """
+    Store a solution; the ones from optimal solvers also record the exact
+    distance to the goal of every state on the path. Only the optimal
+    solvers are trusted to report that there is no solution: the others can
+    miss one, or run out of time, so a None from them is not stored.
+    """
+    if moves is None and solver not in OPTIMAL_SOLVERS:
+        return
+    cache.put(board, solver, moves, options)
+    if moves is not None and solver in OPTIMAL_SOLVERS:
+        cache.put_distances(board, path_distances(board, moves))
+
+
+def solve_cached(cache, board, solver, **kwargs):
+    """
+    Solve with SOLVERS[solver] unless the cache already holds the answer.
+    """
+    moves = cache.get(board, solver, kwargs)
+    if moves is MISS:
+        known = cache.known_distances(board) if solver in KNOWN_DISTANCE_SOLVERS else None
+        if known:
+            moves = SOLVERS[solver](GameState(board.copy()), known=known, **kwargs)
+            cache.touch_distances(board, known)
+        else:
+            moves = SOLVERS[solver](GameState(board.copy()), **kwargs)
+        store_solution(cache, board, solver, moves, kwargs)
+    return moves
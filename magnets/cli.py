@@ -0,0 +1,136 @@
+# magnets/cli.py
+import argparse
+import json
+import os
+import sys
+import time
+
+from .cache import DEFAULT_CACHE_PATH, KNOWN_DISTANCE_SOLVERS, MISS, SolutionCache, store_solution
+from .instrumentation import SearchStats, TraceSink
+from .levels import load_levels, pack_files
+from .patterndb import PatternDatabase
+from .solvers import SOLVERS
+from .streaming import ANYTIME_SOLVERS, solve_iter
+
+
+def solve_level(board, solver, stats=None, trace=None, cache=None, node_budget=None, time_budget=None, progress=None,
+                **options):
+    # progress, if given, is called with each progress event of solve_iter
+    start = time.perf_counter()
+    # An anytime solver gets the time budget as its own time limit, which changes its result
+    cache_options = dict(options, time_limit=time_budget) if solver in ANYTIME_SOLVERS else options
+    cached = cache.get(board, solver, cache_options) if cache is not None else MISS
+    limit = None
+    if cached is not MISS:
+        moves = cached
+    else:
+        known = cache.known_distances(board) if cache is not None and solver in KNOWN_DISTANCE_SOLVERS else None
+        if known:
+            options = dict(options, known=known)
+        for event in solve_iter(board, solver, node_budget, time_budget, stats=stats, trace=trace, **options):
+            if event['event'] == 'progress' and progress:
+                progress(event)
+        if known:
+            cache.touch_distances(board, known)
+        moves = event['moves']
+        if event['status'] == 'limit':
+            limit = event['reason']
+        elif cache is not None:
+            store_solution(cache, board, solver, moves, cache_options)
+    elapsed = time.perf_counter() - start
+    result = {
+        'solver': solver,
+        'solved': moves is not None,
+        'moves': moves,
+        'length': len(moves) if moves is not None else None,
+        'time': elapsed,
+    }
+    if limit is not None:
+        result['limit'] = limit
+    if cache is not None:
+        result['cached'] = cached is not MISS
+    if stats is not None:
+        result['stats'] = stats.as_dict()
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m magnets', description="Solve Logic Magnets levels without the GUI.")
+    parser.add_argument('files', nargs='+', help="level files (JSON or text) or level pack directories")
+    parser.add_argument('-s', '--solver', choices=sorted(SOLVERS), default='bfs')
+    parser.add_argument('--workers', type=int, help="worker processes for pbfs (default: one per CPU)")
+    parser.add_argument('--width', type=int, help="beam width for beam (default: 64)")
+    parser.add_argument('--time-limit', type=float, metavar='SECONDS',
+                        help="time budget per level; beam returns its best solution by then (default for beam: 5)")
+    parser.add_argument('--node-limit', type=int, metavar='N', help="give up on a level after expanding N nodes")
+    parser.add_argument('--progress', action='store_true', help="report search progress on stderr")
+    parser.add_argument('--work-dir', metavar='DIR', help="layer files for ebfs, kept to resume an interrupted search")
+    parser.add_argument('--pattern-db', metavar='FILE', help="pattern database for astar and idastar (see magnets.patterndb)")
+    parser.add_argument('--memory-limit', type=int, metavar='MB', help="transposition table budget for idastar")
+    parser.add_argument('--cache', nargs='?', const=DEFAULT_CACHE_PATH, metavar='FILE',
+                        help=f"reuse solutions stored in FILE (default: {DEFAULT_CACHE_PATH})")
+    parser.add_argument('--stats', action='store_true', help="include search counters and phase times")
+    parser.add_argument('--trace', metavar='FILE', help="write every expanded and generated state to FILE")
+    args = parser.parse_args(argv)
+
+    options = {}
+    if args.memory_limit is not None and args.solver == 'idastar':
+        options['memory_limit'] = args.memory_limit * 1024 * 1024
+    if args.workers is not None and args.solver == 'pbfs':
+        options['workers'] = args.workers
+    if args.work_dir is not None and args.solver == 'ebfs':
+        options['directory'] = args.work_dir
+    if args.pattern_db is not None and args.solver in ('astar', 'idastar'):
+        options['pattern_db'] = PatternDatabase.load(args.pattern_db)
+    if args.width is not None and args.solver == 'beam':
+        options['width'] = args.width
+
+    def progress(event):
+        print(f"{event['elapsed']:.1f}s: {event['nodes_expanded']} expanded ({event['nodes_per_second']:.0f}/s), "
+              f"frontier {event['frontier']}, depth {event['depth']}", file=sys.stderr)
+
+    trace = TraceSink(args.trace) if args.trace else None
+    cache = SolutionCache(args.cache) if args.cache else None
+    # A level that fails is reported with an error field and the batch goes on
+    errors = 0
+    try:
+        for path in _level_files(args.files):
+            try:
+                levels = load_levels(path)
+            except Exception as e:
+                errors += 1
+                _print_result({'file': path, 'level': None, 'solver': args.solver, 'error': f"{type(e).__name__}: {e}"})
+                continue
+            for name, board in levels:
+                if trace:
+                    trace.message(f"=== {path} {name} ({args.solver})")
+                result = {'file': path, 'level': name}
+                try:
+                    result.update(solve_level(board, args.solver, SearchStats() if args.stats else None, trace, cache,
+                                              args.node_limit, args.time_limit, progress if args.progress else None,
+                                              **options))
+                except Exception as e:
+                    errors += 1
+                    result.update({'solver': args.solver, 'error': f"{type(e).__name__}: {e}"})
+                _print_result(result)
+    finally:
+        if trace:
+            trace.close()
+        if cache:
+            cache.close()
+    if errors:
+        sys.exit(1)
+
+
+def _level_files(paths):
+    # Pack directories are opened file by file, so one bad file does not lose the pack
+    for path in paths:
+        if os.path.isdir(path):
+            yield from pack_files(path)
+        else:
+            yield path
+
+
+def _print_result(result):
+    print(json.dumps(result))
+    sys.stdout.flush()
@@ -0,0 +1,226 @@
+# magnets/external.py
+import heapq
+import json
+import os
+import shutil
+import tempfile
+
+from .heuristics import DistanceTables
+from .instrumentation import SearchStats
+from .packed import PackedLevel
+
+MANIFEST = 'manifest.json'
+
+# States read or written per file operation
+BLOCK = 4096
+
+
+class LayerFiles:
+    """
+    The BFS layers of one level in a directory: layer_NNNN.bin holds the
+    states first reached at depth NNNN as fixed-width big-endian records,
+    sorted and without duplicates, so layers can be merged as streams.
+    manifest.json records the level and the last complete layer.
+    """
+
+    def __init__(self, directory, level, start):
+        self.directory = directory
+        self.level = level
+        self.start = start
+        self.width = (3 * level.size + 7) // 8
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def layer_path(self, depth):
+        return self.path(f'layer_{depth:04d}.bin')
+
+    def read(self, path):
+        width = self.width
+        with open(path, 'rb') as f:
+            while True:
+                block = f.read(width * BLOCK)
+                if not block:
+                    return
+                for offset in range(0, len(block), width):
+                    yield int.from_bytes(block[offset:offset + width], 'big')
+
+    def write(self, path, states):
+        # Writes a sorted stream, dropping repeats; returns how many were written
+        count = 0
+        previous = None
+        block = []
+        with open(path + '.tmp', 'wb') as f:
+            for state in states:
+                if state == previous:
+                    continue
+                previous = state
+                block.append(state.to_bytes(self.width, 'big'))
+                count += 1
+                if len(block) == BLOCK:
+                    f.write(b''.join(block))
+                    block = []
+            f.write(b''.join(block))
+        os.replace(path + '.tmp', path)
+        return count
+
+    def layer(self, depth):
+        return self.read(self.layer_path(depth))
+
+    def load_manifest(self):
+        """
+        The depth of the last complete layer and the sizes of the layers, or
+        None when the directory holds no search of this level.
+        """
+        try:
+            with open(self.path(MANIFEST)) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        level = self.level
+        if manifest.get('level') != [level.n, level.m, [list(target) for target in level.targets]] \
+                or manifest.get('start') != self.start:
+            return None
+        return manifest['depth'], manifest['sizes']
+
+    def save_manifest(self, depth, sizes):
+        manifest = {
+            'level': [self.level.n, self.level.m, [list(target) for target in self.level.targets]],
+            'start': self.start,
+            'depth': depth,
+            'sizes': sizes,
+        }
+        with open(self.path(MANIFEST + '.tmp'), 'w') as f:
+            json.dump(manifest, f)
+        os.replace(self.path(MANIFEST + '.tmp'), self.path(MANIFEST))
+
+
+def external_bfs_solver(initial_state, directory=None, chunk_size=1 << 20, prune=True, stats=None, trace=None):
+    """
+    Breadth-first search that keeps its layers on disk instead of a queue and
+    a visited set in memory, for state spaces larger than RAM. Children are
+    generated with PackedLevel.apply (the packed form of Board.make_move),
+    collected chunk_size at a time, sorted and written as runs. The runs are
+    merged into the next layer while states already in an earlier layer are
+    dropped by a streaming merge against those layers; moves can not always
+    be undone, so every earlier layer has to be checked, not just the last.
+
+    No parent pointers are kept: the path is recovered backwards, scanning
+    each layer for a parent of the state found in the layer after it.
+
+    With a `directory`, the layers and a manifest are left there, and a later
+    call on the same level resumes after the last complete layer. Without
+    one, a temporary directory is used and removed afterwards.
+    """
+    stats = stats if stats is not None else SearchStats()
+    with stats.phase('setup'):
+        level, start = PackedLevel.from_board(initial_state.board)
+        tables = DistanceTables(level, start) if prune else None
+        temporary = directory is None
+        if temporary:
+            directory = tempfile.mkdtemp(prefix='magnets-bfs-')
+        else:
+            os.makedirs(directory, exist_ok=True)
+        files = LayerFiles(directory, level, start)
+    try:
+        if tables and tables.is_dead(start):
+            return None
+        with stats.phase('search'):
+            manifest = files.load_manifest()
+            if manifest is None:
+                depth, sizes = 0, [1]
+                files.write(files.layer_path(0), [start])
+                files.save_manifest(depth, sizes)
+            else:
+                depth, sizes = manifest
+                if trace:
+                    trace.message(f"Resuming after layer {depth}")
+            goal = _find_goal(files, level, depth)
+            while goal is None:
+                size, goal = _expand_layer(files, level, tables, depth, chunk_size, stats)
+                depth += 1
+                sizes.append(size)
+                files.save_manifest(depth, sizes)
+                stats.update_depth(depth)
+                stats.update_frontier(size)
+                if trace:
+                    trace.message(f"Layer {depth}: {size} states")
+                if size == 0:
+                    return None
+
+        with stats.phase('path'):
+            return _recover_path(files, level, goal, depth)
+    finally:
+        if temporary:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+def _find_goal(files, level, depth):
+    for state in files.layer(depth):
+        if level.is_final_state(state):
+            return state
+    return None
+
+
+def _expand_layer(files, level, tables, depth, chunk_size, stats):
+    # Write layer depth + 1 from layer depth; returns its size and a goal in it, if any
+    runs = []
+    chunk = []
+
+    def flush():
+        chunk.sort()
+        runs.append(files.path(f'run_{depth + 1:04d}_{len(runs):04d}.bin'))
+        files.write(runs[-1], chunk)
+        chunk.clear()
+
+    for state in files.layer(depth):
+        stats.nodes_expanded += 1
+        for move, new_state in level.children(state):
+            stats.nodes_generated += 1
+            if tables and tables.is_dead(new_state):
+                stats.pruned += 1
+                continue
+            chunk.append(new_state)
+            if len(chunk) >= chunk_size:
+                flush()
+    if chunk or not runs:
+        flush()
+
+    candidates = heapq.merge(*(files.read(run) for run in runs))
+    earlier = heapq.merge(*(files.layer(d) for d in range(depth + 1)))
+    goal = []
+
+    def new_states():
+        seen = next(earlier, None)
+        for state in candidates:
+            while seen is not None and seen < state:
+                seen = next(earlier, None)
+            if state == seen:
+                stats.duplicates += 1
+                continue
+            if not goal and level.is_final_state(state):
+                goal.append(state)
+            yield state
+
+    size = files.write(files.layer_path(depth + 1), new_states())
+    for run in runs:
+        os.remove(run)
+    return size, goal[0] if goal else None
+
+
+def _recover_path(files, level, goal, depth):
+    path = []
+    state = goal
+    for d in range(depth - 1, -1, -1):
+        parent_move = None
+        for parent in files.layer(d):
+            for move, child in level.children(parent):
+                if child == state:
+                    parent_move = (parent, move)
+                    break
+            if parent_move:
+                break
+        parent, move = parent_move
+        path.append(level.format_move(parent, move))
+        state = parent
+    return list(reversed(path))
@@ -0,0 +1,162 @@
+# magnets/heuristics.py
+from collections import deque
+
+from .packed import bits
+
+INFINITY = float('inf')
+
+DIRECTIONS = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+
+
+class DistanceTables:
+    """
+    Per-level lower bounds on the number of moves a piece needs to get from a
+    cell to a target, the A* heuristic built on them, and the dead states
+    they prove unsolvable.
+
+    A Red or Purple magnet can be moved to any free cell, so it needs one move
+    unless it is already on the target. A Gray magnet is only ever shifted one
+    cell by a move, and only in the directions the magnets of the level can
+    shift it (see gray_steps), so it needs at least as many moves as it takes
+    to walk there in those steps, which is infinite from a cell no target can
+    be reached from.
+
+    `state` is any state of the level, used for which magnet types it has.
+    Pieces never change type, so that holds for every state of the search.
+    Without it both types are assumed. A PatternDatabase built for the level
+    family, if given, raises the heuristic to its distance when larger.
+    `known` exact distances (a cache.KnownDistances) replace the heuristic
+    for the states they cover.
+    """
+
+    def __init__(self, level, state=None, pattern_db=None, known=None):
+        self.level = level
+        self.pattern_db = pattern_db
+        self.known = known
+        red, purple, _ = level.unpack(state) if state is not None else (1, 1, 0)
+        self.targets = [level.cell(row, col) for row, col in level.targets]
+        self.magnet = [[0 if cell == target else 1 for target in self.targets] for cell in range(level.size)]
+        steps = gray_steps(level, bool(red), bool(purple))
+        self.gray = [self._gray_distances(steps, cell) for cell in range(level.size)]
+        # Cells a Gray magnet can never leave for a target
+        self.dead_cells = 0
+        for cell in range(level.size):
+            if all(distance == INFINITY for distance in self.gray[cell]):
+                self.dead_cells |= 1 << cell
+        # Gray placements (by mask) that can not all get a target of their own
+        self._dead_grays = {}
+        self.closest_gray = [min(row, default=INFINITY) for row in self.gray]
+
+    def _gray_distances(self, steps, cell):
+        distance = {cell: 0}
+        queue = deque([cell])
+        while queue:
+            current = queue.popleft()
+            for next_cell in steps[current]:
+                if next_cell not in distance:
+                    distance[next_cell] = distance[current] + 1
+                    queue.append(next_cell)
+        return [distance.get(target, INFINITY) for target in self.targets]
+
+    def is_dead(self, state):
+        """
+        True if the state provably can not reach the goal: there are more
+        pieces than targets, a Gray magnet sits on a dead cell, or the Gray
+        magnets can not all reach distinct targets. Checks the cheap masks
+        first; the matching is done once per Gray placement.
+        """
+        gray = state >> (2 * self.level.size)
+        if gray & self.dead_cells or state.bit_count() > len(self.targets):
+            return True
+        dead = self._dead_grays.get(gray)
+        if dead is None:
+            rows = [self.gray[cell] for cell in bits(gray)]
+            dead = self._dead_grays[gray] = not _has_matching(rows, self.level.size)
+        return dead
+
+    def estimate(self, state):
+        """
+        Sum over the pieces of the distance to their closest target. Not a
+        lower bound, since one move can shift several pieces, but finer
+        grained than the heuristic, which local search needs to tell
+        neighbouring states apart.
+        """
+        red, purple, gray = self.level.unpack(state)
+        total = ((red | purple) & ~self.level.targets_mask).bit_count()
+        for cell in bits(gray):
+            total += self.closest_gray[cell]
+        return total
+
+    def heuristic(self, state):
+        """
+        Each move shifts every piece by at most one cell (or jumps the moved
+        magnet), so for any assignment of pieces to distinct targets the goal
+        is at least max(distance) moves away. The heuristic is the smallest
+        such maximum over all assignments (a bottleneck matching), which makes
+        it admissible and consistent. Dead states get INFINITY.
+        """
+        if self.known is not None:
+            exact = self.known.get(state)
+            if exact is not None:
+                return exact
+        distance = self._matching_bound(state)
+        if self.pattern_db is not None and distance != INFINITY:
+            distance = max(distance, self.pattern_db.heuristic(state))
+        return distance
+
+    def _matching_bound(self, state):
+        red, purple, gray = self.level.unpack(state)
+        if gray & self.dead_cells:
+            return INFINITY
+        rows = [self.magnet[cell] for cell in bits(red | purple)]
+        rows += [self.gray[cell] for cell in bits(gray)]
+        if len(rows) > len(self.targets):
+            return INFINITY
+        for threshold in sorted({d for row in rows for d in row if d != INFINITY}):
+            if _has_matching(rows, threshold):
+                return threshold
+        return INFINITY if rows else 0
+
+
+def gray_steps(level, red=True, purple=True):
+    """
+    The cells a Gray magnet on each cell can be shifted to in one move. A Red
+    magnet pulls it one cell towards where the Red lands, which must be at
+    least two cells further along (landing next to it pulls it into the Red).
+    A Purple magnet pushes it one cell away, landing anywhere on the other
+    side. So with only Purple magnets a Gray can never leave the edge it is
+    on, and with only Red magnets it can never reach an edge it is not on.
+    """
+    steps = []
+    for cell in range(level.size):
+        row, col = level.position(cell)
+        cell_steps = []
+        for d_row, d_col in DIRECTIONS:
+            if not _on_board(level, row + d_row, col + d_col):
+                continue
+            pulled = red and _on_board(level, row + 2 * d_row, col + 2 * d_col)
+            pushed = purple and _on_board(level, row - d_row, col - d_col)
+            if pulled or pushed:
+                cell_steps.append(level.cell(row + d_row, col + d_col))
+        steps.append(cell_steps)
+    return steps
+
+
+def _on_board(level, row, col):
+    return 0 <= row < level.n and 0 <= col < level.m
+
+
+def _has_matching(rows, threshold):
+    # Kuhn's augmenting paths: can every piece get its own target within threshold?
+    owner = {}
+
+    def augment(piece, seen):
+        for target, distance in enumerate(rows[piece]):
+            if distance <= threshold and target not in seen:
+                seen.add(target)
+                if target not in owner or augment(owner[target], seen):
+                    owner[target] = piece
+                    return True
+        return False
+
+    return all(augment(piece, set()) for piece in range(len(rows)))
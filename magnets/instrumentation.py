@@ -0,0 +1,113 @@
+# magnets/instrumentation.py
+import time
+from contextlib import contextmanager
+
+
+class SearchCancelled(Exception):
+    pass
+
+
+class SearchLimitExceeded(SearchCancelled):
+    pass
+
+
+class SearchStats:
+    """
+    Counters filled in by a solver run. Pass an instance as `stats=` to any
+    solver to read them afterwards; solvers called without one still count,
+    but nobody looks.
+
+    The counters can also be read from another thread while the solver runs
+    (frontier and depth are the current values, for progress reports). Set
+    `cancel` to a threading.Event and the solver raises SearchCancelled at
+    its next frontier update once the event is set. With node_limit (nodes
+    expanded) or time_limit (seconds from now), it raises
+    SearchLimitExceeded there once the limit is passed.
+
+    Anytime solvers pass each better solution to report_solution, which
+    calls `on_solution` with it when set.
+    """
+
+    def __init__(self, cancel=None, node_limit=None, time_limit=None):
+        self.nodes_expanded = 0
+        self.nodes_generated = 0
+        self.duplicates = 0
+        self.pruned = 0
+        self.frontier = 0
+        self.frontier_peak = 0
+        self.depth = 0
+        self.phase_times = {}
+        self.cancel = cancel
+        self.node_limit = node_limit
+        self.deadline = time.perf_counter() + time_limit if time_limit is not None else None
+        self.on_solution = None
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phase_times[name] = self.phase_times.get(name, 0.0) + time.perf_counter() - start
+
+    def update_frontier(self, size):
+        self.frontier = size
+        if size > self.frontier_peak:
+            self.frontier_peak = size
+        if self.cancel is not None and self.cancel.is_set():
+            raise SearchCancelled()
+        if self.node_limit is not None and self.nodes_expanded > self.node_limit:
+            raise SearchLimitExceeded(f"node limit of {self.node_limit} reached")
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            raise SearchLimitExceeded("time limit reached")
+
+    def update_depth(self, depth):
+        # Search depth reached so far (layer, g or depth limit, per solver)
+        if depth > self.depth:
+            self.depth = depth
+
+    def report_solution(self, moves):
+        if self.on_solution is not None:
+            self.on_solution(list(moves))
+
+    def as_dict(self):
+        return {
+            'nodes_expanded': self.nodes_expanded,
+            'nodes_generated': self.nodes_generated,
+            'duplicates': self.duplicates,
+            'pruned': self.pruned,
+            'frontier_peak': self.frontier_peak,
+            'depth': self.depth,
+            'phase_times': dict(self.phase_times),
+        }
+
+
+class TraceSink:
+    """
+    Opt-in trace of a search written to a file: every expanded state and
+    every generated child, with the boards drawn as Board.display does.
+    """
+
+    def __init__(self, path):
+        self.file = open(path, 'w')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.file.close()
+
+    def message(self, text):
+        self.file.write(text + "\n")
+
+    def expand(self, level, state):
+        self.file.write("Current Game State:\n")
+        self.file.write(level.to_board(state).render() + "\n")
+
+    def generate(self, level, parent, move, child, is_new):
+        self.file.write(f"Attempting to move {level.format_move(parent, move)}\n")
+        self.file.write("Resulting State:" + ("" if is_new else " (already seen)") + "\n")
+        self.file.write(level.to_board(child).render() + "\n")
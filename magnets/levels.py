@@ -0,0 +1,138 @@
+# magnets/levels.py
+import json
+import os
+
+from .board import PIECE_TYPES, Piece, Board, GameState
+
+# Text format: one character per cell, cells separated by spaces.
+#   .  empty cell          T  empty target
+#   R  Red magnet          r  Red magnet on a target
+#   P  Purple magnet       p  Purple magnet on a target
+#   G  Gray magnet         g  Gray magnet on a target
+# Levels are separated by blank lines; a "# name: ..." line names the next level
+# and other "#" lines are comments.
+CELL_PIECES = {'R': 'Red', 'P': 'Purple', 'G': 'Gray'}
+
+LEVEL_EXTENSIONS = ('.json', '.txt')
+
+
+def level_from_dict(data):
+    pieces = []
+    for piece in data['pieces']:
+        if piece['type'] not in PIECE_TYPES:
+            raise ValueError(f"Unknown piece type: {piece['type']}")
+        pieces.append(Piece(piece['type'], tuple(piece['position'])))
+    targets = [tuple(target) for target in data['targets']]
+    return Board(data['n'], data['m'], pieces, targets)
+
+
+def level_to_dict(board, name=None):
+    data = {'name': name} if name else {}
+    data.update({
+        'n': board.n,
+        'm': board.m,
+        'pieces': [{'type': piece.piece_type, 'position': list(piece.position)} for piece in board.pieces.values()],
+        'targets': [list(target) for target in board.targets],
+    })
+    return data
+
+
+def level_from_text(lines):
+    rows = [line.split() for line in lines]
+    if any(len(row) != len(rows[0]) for row in rows):
+        raise ValueError("All rows of a level must have the same number of cells")
+    pieces = []
+    targets = []
+    for row, cells in enumerate(rows):
+        for col, cell in enumerate(cells):
+            if cell not in '.TRPGrpg' or len(cell) != 1:
+                raise ValueError(f"Unknown cell {cell!r} at ({row}, {col})")
+            if cell in 'Ttrpg':
+                targets.append((row, col))
+            if cell.upper() in CELL_PIECES:
+                pieces.append(Piece(CELL_PIECES[cell.upper()], (row, col)))
+    return Board(len(rows), len(rows[0]), pieces, targets)
+
+
+def level_to_text(board, name=None):
+    lines = [f"# name: {name}"] if name else []
+    for row in range(board.n):
+        cells = []
+        for col in range(board.m):
+            piece = board.pieces.get((row, col))
+            on_target = (row, col) in board.targets
+            if piece:
+                cells.append(piece.piece_type[0].lower() if on_target else piece.piece_type[0])
+            else:
+                cells.append('T' if on_target else '.')
+        lines.append(" ".join(cells))
+    return "\n".join(lines)
+
+
+def _load_text_levels(path, default_name):
+    levels = []
+    name, lines = None, []
+
+    def flush():
+        if lines:
+            index = len(levels)
+            levels.append((name or f"{default_name}#{index}", level_from_text(lines)))
+
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                flush()
+                name, lines = None, []
+            elif line.startswith('#'):
+                if line[1:].strip().startswith('name:'):
+                    name = line[1:].strip()[len('name:'):].strip()
+            else:
+                lines.append(line)
+    flush()
+    if len(levels) == 1 and levels[0][0] == f"{default_name}#0":
+        levels = [(default_name, levels[0][1])]
+    return levels
+
+
+def load_levels(path):
+    """
+    Load the levels stored in a file: a JSON file holding either a single
+    level or a list of levels, or a text file of levels (see the format
+    above). A directory is a level pack: every level file in it, in file name
+    order. Returns a list of (name, board) pairs.
+    """
+    if os.path.isdir(path):
+        return load_pack(path)
+    default_name = os.path.splitext(os.path.basename(path))[0]
+    if not path.endswith('.json'):
+        return _load_text_levels(path, default_name)
+    with open(path) as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = [data]
+    levels = []
+    for index, level in enumerate(data):
+        name = level.get('name', default_name if len(data) == 1 else f"{default_name}#{index}")
+        levels.append((name, level_from_dict(level)))
+    return levels
+
+
+def pack_files(directory):
+    # The level files of a pack, in file name order
+    return [os.path.join(directory, filename) for filename in sorted(os.listdir(directory))
+            if filename.endswith(LEVEL_EXTENSIONS)]
+
+
+def load_pack(directory):
+    levels = []
+    for path in pack_files(directory):
+        levels.extend(load_levels(path))
+    return levels
+
+
+def load_game_state(path, index=0):
+    """
+    GameState of one level of a level file (the first one by default).
+    """
+    return GameState(load_levels(path)[index][1])
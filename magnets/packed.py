@@ -0,0 +1,163 @@
+# magnets/packed.py
+from .board import PIECE_TYPES, Piece, Board, move_notation
+
+
+class PackedLevel:
+    """
+    Static data of a level (size and targets) for searching on packed states.
+
+    A packed state is a single int holding one bitboard per piece type:
+    bits [0, size) are the Red magnets, [size, 2 * size) the Purple magnets
+    and [2 * size, 3 * size) the Gray magnets, where cell (row, col) is bit
+    row * m + col. States are immutable and hashable, so the solvers can put
+    them straight into their visited sets.
+    """
+
+    def __init__(self, n, m, targets):
+        self.n = n
+        self.m = m
+        self.size = n * m
+        self.full = (1 << self.size) - 1
+        self.targets = list(targets)
+        self.targets_mask = 0
+        for row, col in self.targets:
+            self.targets_mask |= 1 << self.cell(row, col)
+        # The (from, to) shifts a magnet landing on a cell tries, in the same
+        # order as Board._pull_magnets and Board._push_magnets
+        self.pull_shifts = [self._pull_shifts(cell) for cell in range(self.size)]
+        self.push_shifts = [self._push_shifts(cell) for cell in range(self.size)]
+
+    @classmethod
+    def from_board(cls, board):
+        level = cls(board.n, board.m, board.targets)
+        return level, level.pack(board)
+
+    def cell(self, row, col):
+        return row * self.m + col
+
+    def position(self, cell):
+        return divmod(cell, self.m)
+
+    def _pull_shifts(self, cell):
+        row, col = self.position(cell)
+        shifts = []
+        for i in range(1, self.m):
+            if col - i >= 0:
+                shifts.append((self.cell(row, col - i), self.cell(row, col - i + 1)))
+            if col + i < self.m:
+                shifts.append((self.cell(row, col + i), self.cell(row, col + i - 1)))
+        for i in range(1, self.n):
+            if row - i >= 0:
+                shifts.append((self.cell(row - i, col), self.cell(row - i + 1, col)))
+            if row + i < self.n:
+                shifts.append((self.cell(row + i, col), self.cell(row + i - 1, col)))
+        return shifts
+
+    def _push_shifts(self, cell):
+        row, col = self.position(cell)
+        shifts = []
+        for i in range(self.m - 1, 0, -1):
+            if col - i - 1 >= 0:
+                shifts.append((self.cell(row, col - i), self.cell(row, col - i - 1)))
+            if col + i + 1 < self.m:
+                shifts.append((self.cell(row, col + i), self.cell(row, col + i + 1)))
+        for i in range(self.n - 1, 0, -1):
+            if row - i - 1 >= 0:
+                shifts.append((self.cell(row - i, col), self.cell(row - i - 1, col)))
+            if row + i + 1 < self.n:
+                shifts.append((self.cell(row + i, col), self.cell(row + i + 1, col)))
+        return shifts
+
+    def pack(self, board):
+        masks = [0, 0, 0]
+        for piece in board.pieces.values():
+            row, col = piece.position
+            masks[PIECE_TYPES.index(piece.piece_type)] |= 1 << self.cell(row, col)
+        return masks[0] | (masks[1] << self.size) | (masks[2] << (2 * self.size))
+
+    def unpack(self, state):
+        return state & self.full, (state >> self.size) & self.full, state >> (2 * self.size)
+
+    def pieces(self, state):
+        pieces = []
+        for piece_type, mask in zip(PIECE_TYPES, self.unpack(state)):
+            for cell in bits(mask):
+                pieces.append(Piece(piece_type, self.position(cell)))
+        return pieces
+
+    def to_board(self, state):
+        return Board(self.n, self.m, self.pieces(state), self.targets)
+
+    def piece_type_at(self, state, cell):
+        for piece_type, mask in zip(PIECE_TYPES, self.unpack(state)):
+            if mask >> cell & 1:
+                return piece_type
+        return None
+
+    def is_final_state(self, state):
+        red, purple, gray = self.unpack(state)
+        return (red | purple | gray) & ~self.targets_mask == 0
+
+    def moves(self, state):
+        """
+        Moves are encoded as ints: src * size + dst, with src the cell of the
+        magnet being moved and dst the free cell it goes to.
+        """
+        red, purple, gray = self.unpack(state)
+        free = ~(red | purple | gray) & self.full
+        free_cells = bits(free)
+        return [src * self.size + dst for src in bits(red | purple) for dst in free_cells]
+
+    def apply(self, state, move):
+        src, dst = divmod(move, self.size)
+        red, purple, gray = self.unpack(state)
+        moved = (1 << src) | (1 << dst)
+        if red >> src & 1:
+            red ^= moved
+            shifts = self.pull_shifts[dst]
+        else:
+            purple ^= moved
+            shifts = self.push_shifts[dst]
+        occupied = red | purple | gray
+        for frm, to in shifts:
+            if occupied >> frm & 1 and not occupied >> to & 1:
+                step = (1 << frm) | (1 << to)
+                occupied ^= step
+                if red >> frm & 1:
+                    red ^= step
+                elif purple >> frm & 1:
+                    purple ^= step
+                else:
+                    gray ^= step
+        return red | (purple << self.size) | (gray << (2 * self.size))
+
+    def children(self, state):
+        for move in self.moves(state):
+            yield move, self.apply(state, move)
+
+    def format_move(self, state, move):
+        src, dst = divmod(move, self.size)
+        return move_notation(self.piece_type_at(state, src), self.position(src), self.position(dst))
+
+    def solution(self, came_from, state, key=None):
+        """
+        Follow the came_from parent pointers (state -> (parent, move)) back from
+        state and return the move notation of the path, first move first.
+        When came_from is keyed by key(state) (canonical states), each entry
+        still holds the actual parent state and move.
+        """
+        path = []
+        while came_from[key(state) if key else state] is not None:
+            parent, move = came_from[key(state) if key else state]
+            path.append(self.format_move(parent, move))
+            state = parent
+        return list(reversed(path))
+
+
+def bits(mask):
+    cells = []
+    while mask:
+        low = mask & -mask
+        cells.append(low.bit_length() - 1)
+        mask ^= low
+    return cells
@@ -0,0 +1,161 @@
+# magnets/parallel.py
+import multiprocessing
+import os
+
+from .heuristics import DistanceTables
+from .instrumentation import SearchStats
+from .packed import PackedLevel
+
+
+def _shard_worker(conn, inboxes, n, m, targets, start, prune, index):
+    """
+    Owns the states whose hash falls in shard `index`: their parent pointers
+    (which double as this shard's part of the visited set) and the part of
+    the current BFS layer made of them. Dead children are dropped before
+    they are sent anywhere. Children owned by other shards go straight to
+    those shards' inboxes; the coordinator only sees the counters.
+    """
+    level = PackedLevel(n, m, targets)
+    tables = DistanceTables(level, start) if prune else None
+    shards = len(inboxes)
+    came_from = {}
+    layer = []
+
+    def add(candidates):
+        # Keep the candidates never seen before; returns how many were dropped and a goal among them
+        goal = None
+        duplicates = 0
+        for state, parent, move in candidates:
+            if state in came_from:
+                duplicates += 1
+                continue
+            came_from[state] = (parent, move) if parent is not None else None
+            layer.append(state)
+            if goal is None and level.is_final_state(state):
+                goal = state
+        return duplicates, goal
+
+    while True:
+        command, payload = conn.recv()
+        if command == 'add':
+            conn.send(add(payload))
+        elif command == 'expand':
+            # Expand this shard's part of the layer, bucketing children by owner
+            buckets = [{} for _ in range(shards)]
+            generated = 0
+            pruned = 0
+            for state in layer:
+                for move, new_state in level.children(state):
+                    generated += 1
+                    if tables and tables.is_dead(new_state):
+                        pruned += 1
+                        continue
+                    bucket = buckets[hash(new_state) % shards]
+                    if new_state not in bucket and new_state not in came_from:
+                        bucket[new_state] = (state, move)
+            expanded = len(layer)
+            layer = []
+            buckets = [[(s, p, mv) for s, (p, mv) in bucket.items()] for bucket in buckets]
+            for other, inbox in enumerate(inboxes):
+                if other != index:
+                    inbox.put((index, buckets[other]))
+            received = {index: buckets[index]}
+            while len(received) < shards:
+                sender, bucket = inboxes[index].get()
+                received[sender] = bucket
+            # In shard order, so the parent kept for a state does not depend on timing
+            duplicates = 0
+            goal = None
+            for sender in range(shards):
+                dropped, shard_goal = add(received[sender])
+                duplicates += dropped
+                goal = goal if goal is not None else shard_goal
+            conn.send((expanded, generated, pruned, len(layer), duplicates, goal))
+        elif command == 'parent':
+            conn.send(came_from[payload])
+        elif command == 'stop':
+            conn.close()
+            return
+
+
+def parallel_bfs_solver(initial_state, workers=None, prune=True, stats=None, trace=None):
+    """
+    Level-synchronous BFS over a pool of worker processes. Each worker owns a
+    shard of the state space (by state hash): it keeps the visited states and
+    parent pointers of that shard and expands that shard's part of every
+    layer. The children of a layer are sent to their owners for duplicate
+    detection, worker to worker through one inbox queue per shard, so the
+    first layer holding a goal gives a shortest solution, the same length
+    bfs_solver finds. The coordinating process only steps the layers and
+    adds up the counters.
+    """
+    stats = stats if stats is not None else SearchStats()
+    workers = workers or os.cpu_count() or 1
+    with stats.phase('setup'):
+        level, start = PackedLevel.from_board(initial_state.board)
+        if prune and DistanceTables(level, start).is_dead(start):
+            return None
+        context = multiprocessing.get_context()
+        inboxes = [context.Queue() for _ in range(workers)]
+        connections = []
+        processes = []
+        for index in range(workers):
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(target=_shard_worker,
+                                      args=(child_conn, inboxes, level.n, level.m, level.targets, start, prune, index),
+                                      daemon=True)
+            process.start()
+            child_conn.close()
+            connections.append(parent_conn)
+            processes.append(process)
+
+    def owner(state):
+        return connections[hash(state) % workers]
+
+    try:
+        with stats.phase('search'):
+            owner(start).send(('add', [(start, None, None)]))
+            owner(start).recv()
+            goal = start if level.is_final_state(start) else None
+            depth = 0
+            while goal is None:
+                for conn in connections:
+                    conn.send(('expand', None))
+                layer_size = 0
+                for conn in connections:
+                    expanded, generated, pruned, size, duplicates, shard_goal = conn.recv()
+                    stats.nodes_expanded += expanded
+                    stats.nodes_generated += generated
+                    stats.pruned += pruned
+                    layer_size += size
+                    stats.duplicates += duplicates
+                    if goal is None and shard_goal is not None:
+                        goal = shard_goal
+                depth += 1
+                stats.update_depth(depth)
+                stats.update_frontier(layer_size)
+                if trace:
+                    trace.message(f"Layer {depth}: {layer_size} states")
+                if goal is None and layer_size == 0:
+                    return None
+
+        with stats.phase('path'):
+            path = []
+            state = goal
+            while True:
+                owner(state).send(('parent', state))
+                link = owner(state).recv()
+                if link is None:
+                    break
+                parent, move = link
+                path.append(level.format_move(parent, move))
+                state = parent
+            return list(reversed(path))
+    finally:
+        for conn in connections:
+            conn.send(('stop', None))
+            conn.close()
+        for process in processes:
+            process.join()
+        for inbox in inboxes:
+            inbox.close()
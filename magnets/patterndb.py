@@ -0,0 +1,206 @@
+# magnets/patterndb.py
+import argparse
+import json
+import time
+from array import array
+from collections import deque
+from itertools import combinations
+
+from .heuristics import INFINITY
+from .levels import load_levels
+from .packed import PackedLevel, bits
+
+FORMAT = 'logic-magnets-pdb'
+VERSION = 1
+
+# Distance byte of abstract states that can not reach the goal
+UNREACHED = 255
+
+
+class PatternDatabase:
+    """
+    Exact goal distances in an abstraction of a level family: the board size,
+    the targets and the magnet types (Red, Purple) of the levels. An abstract
+    state keeps only the cells of up to `pieces` Gray magnets; a table is
+    built for every pattern size from 1 to `pieces`.
+
+    The abstraction drops every other piece, so it can not know which shifts
+    they block. Its moves are a magnet of a type the family has landing on
+    any cell no pattern Gray is on, after which each Gray the real move
+    would try to shift may or may not be shifted. Every real move then maps
+    to an abstract move (or to staying put), so the abstract distances are
+    lower bounds on the real ones, and on any subset of the Grays.
+
+    The tables are indexed by the colex rank of the sorted Gray cells and
+    hold one byte per state.
+    """
+
+    def __init__(self, n, m, targets, red, purple, pieces, tables):
+        self.level = PackedLevel(n, m, targets)
+        self.red = red
+        self.purple = purple
+        self.pieces = pieces
+        # tables[k]: distances of the k-Gray patterns (tables[0] is unused)
+        self.tables = tables
+        size = self.level.size
+        self.binomials = [[_binomial(cell, k) for k in range(pieces + 1)] for cell in range(size)]
+
+    @classmethod
+    def build(cls, level, red=True, purple=True, pieces=3, progress=None):
+        """
+        Build the tables by retrograde BFS: enumerate every pattern of each
+        size, collect the predecessors of each abstract state from its
+        successors, and search backwards from the states with every Gray on
+        a target.
+        """
+        database = cls(level.n, level.m, level.targets, red, purple, pieces, [array('B')])
+        for k in range(1, pieces + 1):
+            database.tables.append(database._build_table(k))
+            if progress:
+                progress(k, database.tables[k])
+        return database
+
+    def _build_table(self, k):
+        level = self.level
+        table = array('B', [UNREACHED]) * _binomial(level.size, k)
+        predecessors = [[] for _ in range(len(table))]
+        queue = deque()
+        for cells in combinations(range(level.size), k):
+            mask = sum(1 << cell for cell in cells)
+            index = self.rank(cells)
+            if mask & ~level.targets_mask == 0:
+                table[index] = 0
+                queue.append(index)
+            for successor in self._successors(mask):
+                predecessors[self.rank(bits(successor))].append(index)
+        while queue:
+            index = queue.popleft()
+            distance = table[index] + 1
+            for predecessor in predecessors[index]:
+                if table[predecessor] == UNREACHED:
+                    # Longer distances do not fit in a byte; they stay lower bounds
+                    table[predecessor] = min(distance, UNREACHED - 1)
+                    queue.append(predecessor)
+        return table
+
+    def _successors(self, mask):
+        level = self.level
+        successors = set()
+        for dst in range(level.size):
+            if mask >> dst & 1:
+                continue
+            kinds = ([level.pull_shifts[dst]] if self.red else []) + ([level.push_shifts[dst]] if self.purple else [])
+            for shifts in kinds:
+                outcomes = {mask}
+                for frm, to in shifts:
+                    shifted = set()
+                    for outcome in outcomes:
+                        # The magnet just landed on dst, so nothing is shifted onto it
+                        if outcome >> frm & 1 and not (outcome | 1 << dst) >> to & 1:
+                            shifted.add(outcome ^ (1 << frm) ^ (1 << to))
+                    outcomes |= shifted
+                successors |= outcomes
+        successors.discard(mask)
+        return successors
+
+    def rank(self, cells):
+        # Colex rank of sorted cells among the patterns of their size
+        return sum(self.binomials[cell][k] for k, cell in enumerate(cells, 1))
+
+    def matches(self, level, state):
+        """
+        True if the database applies to a level: same board and targets, and
+        no magnet type the database was built without.
+        """
+        red, purple, _ = level.unpack(state)
+        return (level.n, level.m) == (self.level.n, self.level.m) \
+            and set(level.targets) == set(self.level.targets) \
+            and (self.red or not red) and (self.purple or not purple)
+
+    def heuristic(self, state):
+        """
+        The largest distance over the patterns of the state's Gray magnets:
+        the Grays themselves when there are at most `pieces` of them, else
+        every subset of `pieces` of them. INFINITY when a pattern can never
+        reach the goal.
+        """
+        cells = bits(state >> (2 * self.level.size))
+        if not cells:
+            return 0
+        k = min(len(cells), self.pieces)
+        table = self.tables[k]
+        if len(cells) == k:
+            distance = table[self.rank(cells)]
+        else:
+            distance = max(table[self.rank(subset)] for subset in combinations(cells, k))
+        return INFINITY if distance == UNREACHED else distance
+
+    def describe(self):
+        # Everything the tables depend on; also the header of a saved database
+        return {
+            'format': FORMAT,
+            'version': VERSION,
+            'n': self.level.n,
+            'm': self.level.m,
+            'targets': [list(target) for target in self.level.targets],
+            'red': self.red,
+            'purple': self.purple,
+            'pieces': self.pieces,
+        }
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(json.dumps(self.describe()).encode() + b'\n')
+            for table in self.tables[1:]:
+                table.tofile(f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            header = json.loads(f.readline())
+            if header.get('format') != FORMAT or header.get('version') != VERSION:
+                raise ValueError(f"{path} is not a version {VERSION} pattern database")
+            size = header['n'] * header['m']
+            tables = [array('B')]
+            for k in range(1, header['pieces'] + 1):
+                table = array('B')
+                table.fromfile(f, _binomial(size, k))
+                tables.append(table)
+        targets = [tuple(target) for target in header['targets']]
+        return cls(header['n'], header['m'], targets, header['red'], header['purple'], header['pieces'], tables)
+
+
+def _binomial(n, k):
+    if k < 0 or k > n:
+        return 0
+    result = 1
+    for i in range(k):
+        result = result * (n - i) // (i + 1)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m magnets.patterndb',
+                                     description="Build a pattern database for the family of a level (its size, targets and magnet types).")
+    parser.add_argument('file', help="level file")
+    parser.add_argument('--index', type=int, default=0, help="level in the file (default: 0)")
+    parser.add_argument('--pieces', type=int, default=3, help="largest number of Gray magnets per pattern (default: 3)")
+    parser.add_argument('-o', '--output', required=True, metavar='FILE', help="database file to write")
+    args = parser.parse_args(argv)
+
+    _, board = load_levels(args.file)[args.index]
+    level, state = PackedLevel.from_board(board)
+    red, purple, _ = level.unpack(state)
+    start = time.perf_counter()
+
+    def progress(k, table):
+        reached = [distance for distance in table if distance != UNREACHED]
+        print(f"{k} Gray: {len(table)} patterns, {len(reached)} solvable, "
+              f"max distance {max(reached, default=0)} ({time.perf_counter() - start:.1f}s)")
+
+    database = PatternDatabase.build(level, bool(red), bool(purple), args.pieces, progress)
+    database.save(args.output)
+
+
+if __name__ == '__main__':
+    main()
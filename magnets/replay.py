@@ -0,0 +1,157 @@
+# magnets/replay.py
+import argparse
+import json
+import multiprocessing
+import re
+import sys
+
+from .levels import load_levels
+from .packed import PackedLevel
+
+# "R(2, 3) to (2, 1)" as logged by the GUI and returned by the solvers; the
+# piece may also be spelled out ("Red(2, 3) ...") and the cells doubly
+# parenthesized ("R((2, 3)) to ((2, 1))")
+MOVE_PATTERN = re.compile(r"\s*(\w+)\s*\(\s*\(?\s*(\d+)\s*,\s*(\d+)\s*\)?\s*\)\s*to\s*\(\s*\(?\s*(\d+)\s*,\s*(\d+)\s*\)?\s*\)\s*$")
+
+PIECE_NAMES = {'R': 'Red', 'RED': 'Red', 'P': 'Purple', 'PURPLE': 'Purple', 'G': 'Gray', 'GRAY': 'Gray'}
+
+
+def parse_move(text):
+    """
+    Parse one move in the move log notation into (piece type, (row, col) from,
+    (row, col) to). Raises ValueError.
+    """
+    match = MOVE_PATTERN.match(text)
+    if not match or match.group(1).upper() not in PIECE_NAMES:
+        raise ValueError(f"Not a move: {text!r}")
+    old_row, old_col, new_row, new_col = map(int, match.groups()[1:])
+    return PIECE_NAMES[match.group(1).upper()], (old_row, old_col), (new_row, new_col)
+
+
+def parse_moves(moves):
+    # A list of moves, or a move log with one move per line
+    if isinstance(moves, str):
+        moves = [line for line in moves.splitlines() if line.strip()]
+    return [parse_move(move) for move in moves]
+
+
+class IllegalMove(ValueError):
+    def __init__(self, index, move, reason):
+        super().__init__(f"Move {index + 1} ({move}): {reason}")
+        self.index = index
+
+
+def replay_states(level, state, moves):
+    """
+    Apply parsed moves to a packed state with PackedLevel.apply and return
+    every state along the way, the starting one first. Raises IllegalMove
+    when a move does not start on a magnet of its type or does not land on a
+    free cell of the board.
+    """
+    states = [state]
+    for index, (piece_type, (old_row, old_col), (new_row, new_col)) in enumerate(moves):
+        if not (0 <= old_row < level.n and 0 <= old_col < level.m and 0 <= new_row < level.n and 0 <= new_col < level.m):
+            raise IllegalMove(index, _notation(moves[index]), "off the board")
+        src, dst = level.cell(old_row, old_col), level.cell(new_row, new_col)
+        moved = level.piece_type_at(state, src)
+        if moved is None:
+            raise IllegalMove(index, _notation(moves[index]), "no magnet there")
+        if moved != piece_type:
+            raise IllegalMove(index, _notation(moves[index]), f"the magnet there is {moved}")
+        if moved == 'Gray':
+            raise IllegalMove(index, _notation(moves[index]), "Gray magnets do not move")
+        if level.piece_type_at(state, dst) is not None:
+            raise IllegalMove(index, _notation(moves[index]), "the cell is taken")
+        state = level.apply(state, src * level.size + dst)
+        states.append(state)
+    return states
+
+
+def _notation(move):
+    piece_type, (old_row, old_col), (new_row, new_col) = move
+    return f"{piece_type[0]}({old_row}, {old_col}) to ({new_row}, {new_col})"
+
+
+def validate_solution(board, moves, level=None):
+    """
+    Replay a solution (move notation, as a list or a move log) on a board
+    and report {'valid': all moves legal, 'solved': the last state is
+    final, 'length': number of moves, 'error': why it is invalid, or None}.
+    A PackedLevel of the board can be passed in to skip building one.
+    """
+    result = {'valid': False, 'solved': False, 'length': None, 'error': None}
+    try:
+        parsed = parse_moves(moves)
+        result['length'] = len(parsed)
+        if level is None:
+            level, state = PackedLevel.from_board(board)
+        else:
+            state = level.pack(board)
+        states = replay_states(level, state, parsed)
+    except ValueError as e:
+        result['error'] = str(e)
+        return result
+    result['valid'] = True
+    result['solved'] = level.is_final_state(states[-1])
+    return result
+
+
+def _validate_chunk(items):
+    # Runs in a pool worker; levels of the same size and targets share their shift tables
+    levels = {}
+    results = []
+    for board, moves in items:
+        family = (board.n, board.m, tuple(map(tuple, board.targets)))
+        if family not in levels:
+            levels[family] = PackedLevel(board.n, board.m, board.targets)
+        results.append(validate_solution(board, moves, levels[family]))
+    return results
+
+
+def validate_many(items, processes=None, chunk_size=256):
+    """
+    Validate (board, moves) pairs and return their results in order. With
+    processes > 1 the pairs are split into chunks of chunk_size and checked
+    in a pool of that many worker processes.
+    """
+    items = list(items)
+    chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+    if not processes or processes <= 1 or len(chunks) <= 1:
+        return [result for chunk in chunks for result in _validate_chunk(chunk)]
+    with multiprocessing.get_context().Pool(processes) as pool:
+        return [result for results in pool.map(_validate_chunk, chunks) for result in results]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m magnets.replay',
+                                     description="Check the solutions printed by python -m magnets against their levels.")
+    parser.add_argument('results', nargs='+', help="JSON lines files of results (file, level and moves)")
+    parser.add_argument('--processes', type=int, help="worker processes (default: check in this process)")
+    args = parser.parse_args(argv)
+
+    loaded = {}
+    entries = []
+    for path in args.results:
+        with open(path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if entry.get('moves') is None:
+                    continue
+                if entry['file'] not in loaded:
+                    loaded[entry['file']] = dict(load_levels(entry['file']))
+                entries.append(entry)
+
+    results = validate_many([(loaded[entry['file']][entry['level']], entry['moves']) for entry in entries], args.processes)
+    failures = 0
+    for entry, result in zip(entries, results):
+        failures += not (result['valid'] and result['solved'])
+        print(json.dumps({'file': entry['file'], 'level': entry['level'], 'solver': entry.get('solver'), **result}))
+    if failures:
+        print(f"{failures} of {len(results)} solutions do not solve their level", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,342 @@
+# magnets/service.py
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import urllib.request
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .levels import level_from_dict, level_from_text, level_to_dict
+from .solvers import SOLVERS
+from .streaming import solve_with_budget
+
+DEFAULT_PORT = 8765
+
+# Seconds a request may take beyond its time_limit (queueing, start-up) before
+# the service gives up on it, e.g. because its worker process died
+RESULT_SLACK = 30.0
+
+# pbfs starts its own processes, which pool workers (daemons) can not do
+SERVICE_SOLVERS = sorted(name for name in SOLVERS if name != 'pbfs')
+
+
+def parse_request(data):
+    """
+    Check a solve request and return it normalized:
+    {"level": {...} or "text rows", "solver": "astar", "time_limit": 10,
+    "node_limit": 100000}. Only the level is required. Raises ValueError.
+    """
+    if not isinstance(data, dict) or 'level' not in data:
+        raise ValueError("A request needs a level")
+    level = data['level']
+    try:
+        board = level_from_text(level.strip().splitlines()) if isinstance(level, str) else level_from_dict(level)
+    except (KeyError, TypeError, IndexError) as e:
+        raise ValueError(f"Bad level: {e}")
+    solver = data.get('solver', 'bfs')
+    if solver not in SERVICE_SOLVERS:
+        raise ValueError(f"Unknown solver {solver!r}, expected one of {', '.join(SERVICE_SOLVERS)}")
+    request = {'level': level_to_dict(board), 'solver': solver}
+    for limit in ('time_limit', 'node_limit'):
+        if data.get(limit) is not None:
+            if not isinstance(data[limit], (int, float)) or data[limit] <= 0:
+                raise ValueError(f"{limit} must be a positive number")
+            request[limit] = data[limit]
+    return request
+
+
+def _solve_batch(requests):
+    # Runs in a pool worker: solve each request of the batch in turn
+    return [_solve_one(request) for request in requests]
+
+
+def _solve_one(request):
+    board = level_from_dict(request['level'])
+    done = solve_with_budget(board, request['solver'], node_budget=request.get('node_limit'),
+                             time_budget=request.get('time_limit'))
+    result = {'solver': request['solver'], 'solved': done['moves'] is not None, 'moves': done['moves'],
+              'length': done['length']}
+    if done['status'] == 'limit':
+        result['limit'] = done['reason']
+    result['time'] = done['time']
+    result['stats'] = done['stats']
+    return result
+
+
+class PendingResult:
+    def __init__(self, request):
+        self.request = request
+        self.submitted = time.perf_counter()
+        self.done = threading.Event()
+        self.result = None
+        # The pool task the request was sent in
+        self.task = None
+
+    def wait(self, timeout=None):
+        self.done.wait(timeout)
+        return self.result
+
+
+class ServiceMetrics:
+    """
+    Counters and recent latencies (submit to result, in seconds) of a
+    SolverService, safe to update from several threads.
+    """
+
+    def __init__(self, window=1000):
+        self.lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.limited = 0
+        self.timed_out = 0
+        self.batches = 0
+        self.latencies = deque(maxlen=window)
+        self.solve_times = deque(maxlen=window)
+
+    def as_dict(self, queued=0):
+        with self.lock:
+            latencies = sorted(self.latencies)
+            uptime = time.perf_counter() - self.started
+            return {
+                'uptime': uptime,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'failed': self.failed,
+                'limit_exceeded': self.limited,
+                'timed_out': self.timed_out,
+                'queued': queued,
+                'batches': self.batches,
+                'throughput': self.completed / uptime if uptime > 0 else 0.0,
+                'latency_mean': sum(latencies) / len(latencies) if latencies else None,
+                'latency_p50': _percentile(latencies, 0.5),
+                'latency_p95': _percentile(latencies, 0.95),
+                'solve_time_mean': sum(self.solve_times) / len(self.solve_times) if self.solve_times else None,
+            }
+
+
+def _percentile(values, fraction):
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+class SolverService:
+    """
+    A pool of worker processes that stay up between requests, so each solve
+    skips interpreter start-up and imports. Requests are queued; a dispatcher
+    thread sends each one to the pool as its own task while a worker is
+    idle. Once every worker is busy, it groups queued requests into batches
+    of up to batch_size, waiting at most batch_wait seconds for a batch to
+    fill, so a burst of small levels costs one round trip per batch instead
+    of one per level.
+
+    A pool does not report tasks lost with their worker process, so
+    wait_for gives up on a request after its time_limit (or `timeout`
+    seconds without one) plus RESULT_SLACK.
+    """
+
+    def __init__(self, workers=None, batch_size=8, batch_wait=0.01, timeout=600.0):
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = multiprocessing.get_context().Pool(self.workers)
+        self.timeout = timeout
+        # Ids of the tasks sent to the pool and not finished or given up on yet
+        self.running = set()
+        self.task_ids = itertools.count()
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.queue = queue.Queue()
+        self.metrics = ServiceMetrics()
+        self.dispatcher = threading.Thread(target=self._dispatch, daemon=True)
+        self.dispatcher.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def submit(self, request):
+        pending = PendingResult(parse_request(request))
+        with self.metrics.lock:
+            self.metrics.submitted += 1
+        self.queue.put(pending)
+        return pending
+
+    def solve(self, request):
+        return self.wait_for(self.submit(request))
+
+    def wait_for(self, pending):
+        """
+        The result of a submitted request, or None if it did not come in time.
+        """
+        timeout = pending.request.get('time_limit', self.timeout) + RESULT_SLACK
+        result = pending.wait(timeout)
+        if result is None:
+            with self.metrics.lock:
+                self.metrics.timed_out += 1
+                # Its worker may be gone; stop counting the task as running
+                self.running.discard(pending.task)
+        return result
+
+    def _dispatch(self):
+        while True:
+            pending = self.queue.get()
+            if pending is None:
+                return
+            batch = [pending]
+            with self.metrics.lock:
+                busy = len(self.running) >= self.workers
+            deadline = time.perf_counter() + self.batch_wait
+            while busy and len(batch) < self.batch_size:
+                try:
+                    pending = self.queue.get(timeout=max(0.0, deadline - time.perf_counter()))
+                except queue.Empty:
+                    break
+                if pending is None:
+                    self.queue.put(None)
+                    break
+                batch.append(pending)
+            task = next(self.task_ids)
+            for pending in batch:
+                pending.task = task
+            with self.metrics.lock:
+                self.metrics.batches += 1
+                self.running.add(task)
+            self.pool.apply_async(_solve_batch, ([pending.request for pending in batch],),
+                                  callback=lambda results, task=task, batch=batch: self._finish(task, batch, results),
+                                  error_callback=lambda error, task=task, batch=batch: self._fail(task, batch, error))
+
+    def _finish(self, task, batch, results):
+        now = time.perf_counter()
+        with self.metrics.lock:
+            self.running.discard(task)
+            for pending, result in zip(batch, results):
+                self.metrics.completed += 1
+                self.metrics.limited += 'limit' in result
+                self.metrics.latencies.append(now - pending.submitted)
+                self.metrics.solve_times.append(result['time'])
+        for pending, result in zip(batch, results):
+            pending.result = result
+            pending.done.set()
+
+    def _fail(self, task, batch, error):
+        with self.metrics.lock:
+            self.running.discard(task)
+            self.metrics.failed += len(batch)
+        for pending in batch:
+            pending.result = {'solver': pending.request['solver'], 'solved': False, 'error': repr(error)}
+            pending.done.set()
+
+    def close(self):
+        self.queue.put(None)
+        self.dispatcher.join()
+        self.pool.close()
+        self.pool.join()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # self.server.service is the SolverService
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send(200, {'status': 'ok'})
+        elif self.path == '/metrics':
+            service = self.server.service
+            self._send(200, service.metrics.as_dict(service.queue.qsize()))
+        else:
+            self._send(404, {'error': f"No such path: {self.path}"})
+
+    def do_POST(self):
+        if self.path != '/solve':
+            self._send(404, {'error': f"No such path: {self.path}"})
+            return
+        try:
+            data = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            pending = self.server.service.submit(data)
+        except ValueError as e:
+            self._send(400, {'error': str(e)})
+            return
+        result = self.server.service.wait_for(pending)
+        if result is None:
+            self._send(504, {'error': "No result in time; the worker may have died"})
+        else:
+            self._send(200, result)
+
+    def _send(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # Metrics cover the traffic; keep stderr quiet
+        pass
+
+
+def make_server(service, host='127.0.0.1', port=DEFAULT_PORT):
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.service = service
+    return server
+
+
+class SolverClient:
+    """
+    Client of a running solver service, e.g.
+    SolverClient().solve(board, 'astar', time_limit=10).
+    """
+
+    def __init__(self, url=f'http://127.0.0.1:{DEFAULT_PORT}', timeout=None):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+
+    def solve(self, level, solver='bfs', time_limit=None, node_limit=None):
+        # level: a Board, a level dict or text rows
+        if not isinstance(level, (dict, str)):
+            level = level_to_dict(level)
+        request = {'level': level, 'solver': solver, 'time_limit': time_limit, 'node_limit': node_limit}
+        return self._call('/solve', json.dumps(request).encode())
+
+    def metrics(self):
+        return self._call('/metrics')
+
+    def _call(self, path, data=None):
+        request = urllib.request.Request(self.url + path, data=data, headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m magnets.service', description="Serve the solvers over local HTTP.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--workers', type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument('--batch-size', type=int, default=8, help="most requests sent to a worker at once when all are busy (default: 8)")
+    parser.add_argument('--batch-wait', type=float, default=0.01, metavar='SECONDS',
+                        help="longest wait for a batch to fill (default: 0.01)")
+    parser.add_argument('--timeout', type=float, default=600.0, metavar='SECONDS',
+                        help="longest wait for a request without a time_limit (default: 600)")
+    args = parser.parse_args(argv)
+
+    with SolverService(args.workers, args.batch_size, args.batch_wait, args.timeout) as service:
+        server = make_server(service, args.host, args.port)
+        print(f"Serving on http://{args.host}:{server.server_port}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,570 @@
+# magnets/solvers.py
+from collections import deque
+import heapq
+import random
+import time
+
+from .board import GameState, move_notation
+from .heuristics import INFINITY, DistanceTables
+from .instrumentation import SearchStats
+from .transposition import TranspositionTable
+from .packed import PackedLevel
+from .symmetry import canonical_key
+from .parallel import parallel_bfs_solver
+from .external import external_bfs_solver
+from .vectorized import numpy_bfs_solver
+
+def generate_possible_moves(board, piece):
+    # Any free cell; the board keeps its free cells indexed, so this is one lookup
+    return list(board.free_positions())
+
+
+def bfs_solver(initial_state, symmetry=True, prune=True, stats=None, trace=None):
+    stats = stats if stats is not None else SearchStats()
+    with stats.phase('setup'):
+        level, start = PackedLevel.from_board(initial_state.board)
+        key = canonical_key(level) if symmetry else None
+        tables = DistanceTables(level, start) if prune else None
+    if tables and tables.is_dead(start):
+        return None
+    queue = deque([start])
+    came_from = {key(start) if key else start: None}
+    # States left in the layer being expanded, to report the depth
+    layer_left = 1
+
+    with stats.phase('search'):
+        while queue:
+            current = queue.popleft()
+            stats.nodes_expanded += 1
+            if trace:
+                trace.expand(level, current)
+
+            if level.is_final_state(current):
+                break
+
+            for move in level.moves(current):
+                new_state = level.apply(current, move)
+                stats.nodes_generated += 1
+                if tables and tables.is_dead(new_state):
+                    stats.pruned += 1
+                    continue
+                new_key = key(new_state) if key else new_state
+                is_new = new_key not in came_from
+                if trace:
+                    trace.generate(level, current, move, new_state, is_new)
+
+                if is_new:
+                    came_from[new_key] = (current, move)
+                    queue.append(new_state)
+                else:
+                    stats.duplicates += 1
+            layer_left -= 1
+            if layer_left == 0:
+                layer_left = len(queue)
+                stats.update_depth(stats.depth + 1)
+            stats.update_frontier(len(queue))
+        else:
+            if trace:
+                trace.message("No solution found")
+            return None
+
+    with stats.phase('path'):
+        return level.solution(came_from, current, key)
+
+
+def dfs_solver(initial_state, symmetry=True, prune=True, stats=None, trace=None):
+    stats = stats if stats is not None else SearchStats()
+    with stats.phase('setup'):
+        level, start = PackedLevel.from_board(initial_state.board)
+        key = canonical_key(level) if symmetry else None
+        tables = DistanceTables(level, start) if prune else None
+    if tables and tables.is_dead(start):
+        return None
+    stack = [start]
+    came_from = {key(start) if key else start: None}
+
+    with stats.phase('search'):
+        while stack:
+            current = stack.pop()
+            stats.nodes_expanded += 1
+            if trace:
+                trace.expand(level, current)
+
+            if level.is_final_state(current):
+                break
+
+            for move in level.moves(current):
+                new_state = level.apply(current, move)
+                stats.nodes_generated += 1
+                if tables and tables.is_dead(new_state):
+                    stats.pruned += 1
+                    continue
+                new_key = key(new_state) if key else new_state
+                is_new = new_key not in came_from
+                if trace:
+                    trace.generate(level, current, move, new_state, is_new)
+
+                if is_new:
+                    came_from[new_key] = (current, move)
+                    stack.append(new_state)
+                else:
+                    stats.duplicates += 1
+            stats.update_frontier(len(stack))
+        else:
+            if trace:
+                trace.message("No solution found")
+            return None
+
+    with stats.phase('path'):
+        return level.solution(came_from, current, key)
+
+
+def iddfs_solver(initial_state, max_depth=None, prune=True, verify=False, stats=None, trace=None):
+    """
+    Iterative deepening DFS on a single Board: moves are applied in place and
+    undone on the way back, so memory stays O(depth) instead of keeping every
+    visited state. Only states on the current path are checked for cycles,
+    by the board's incrementally kept Zobrist hash. With verify, a hash match
+    also has to match the exact key, so a collision can never skip a state
+    (at worst a cycle goes unnoticed until the depth limit).
+    Returns the shortest move list, or None if there is no solution within
+    max_depth (or at all, when max_depth is None).
+    """
+    stats = stats if stats is not None else SearchStats()
+    with stats.phase('setup'):
+        board = initial_state.board.copy()
+        # Board.key is laid out as a packed state, so the dead state checks apply to it
+        level, start = PackedLevel.from_board(board)
+        tables = DistanceTables(level, start) if prune else None
+    if tables and tables.is_dead(start):
+        return None
+    path = []
+    # Zobrist hash -> exact key of the states on the path
+    on_path = {board.zobrist: board.key}
+
+    def search(limit):
+        # Returns (found, cutoff), cutoff telling if the depth limit was hit
+        stats.nodes_expanded += 1
+        stats.update_frontier(len(path))
+        if board.is_final_state():
+            return True, False
+        if len(path) == limit:
+            return False, True
+        cutoff = False
+        sources = [(position, piece.piece_type) for position, piece in board.pieces.items() if piece.piece_type != 'Gray']
+        for position, piece_type in sources:
+            for new_position in board.free_positions():
+                record = board.apply_move(position, new_position)
+                stats.nodes_generated += 1
+                if tables and tables.is_dead(board.key):
+                    stats.pruned += 1
+                    board.undo_move(record)
+                    continue
+                seen = on_path.get(board.zobrist)
+                if seen is not None and (not verify or seen == board.key):
+                    stats.duplicates += 1
+                    board.undo_move(record)
+                    continue
+                on_path[board.zobrist] = board.key
+                path.append((piece_type, position, new_position))
+                found, child_cutoff = search(limit)
+                if found:
+                    return True, False
+                cutoff = cutoff or child_cutoff
+                path.pop()
+                on_path.pop(board.zobrist, None)
+                board.undo_move(record)
+        return False, cutoff
+
+    with stats.phase('search'):
+        limit = 0
+        while max_depth is None or limit <= max_depth:
+            if trace:
+                trace.message(f"Depth limit {limit}")
+            stats.update_depth(limit)
+            found, cutoff = search(limit)
+            if found:
+                break
+            if not cutoff:
+                return None
+            limit += 1
+        else:
+            return None
+
+    with stats.phase('path'):
+        return [move_notation(*move) for move in path]
+
+
+def ucs_solver(initial_state, symmetry=True, prune=True, stats=None, trace=None):
+    stats = stats if stats is not None else SearchStats()
+    with stats.phase('setup'):
+        level, start = PackedLevel.from_board(initial_state.board)
+        key = canonical_key(level) if symmetry else None
+        tables = DistanceTables(level, start) if prune else None
+    if tables and tables.is_dead(start):
+        return None
+    priority_queue = [(0, start)]
+    came_from = {key(start) if key else start: None}
+
+    with stats.phase('search'):
+        while priority_queue:
+            current_cost, current = heapq.heappop(priority_queue)
+            stats.nodes_expanded += 1
+            stats.update_depth(current_cost)
+            if trace:
+                trace.expand(level, current)
+
+            if level.is_final_state(current):
+                break
+
+            for move in level.moves(current):
+                new_state = level.apply(current, move)
+                stats.nodes_generated += 1
+                if tables and tables.is_dead(new_state):
+                    stats.pruned += 1
+                    continue
+                new_key = key(new_state) if key else new_state
+                is_new = new_key not in came_from
+                if trace:
+                    trace.generate(level, current, move, new_state, is_new)
+
+                if is_new:
+                    came_from[new_key] = (current, move)
+                    new_cost = current_cost + 1
+                    heapq.heappush(priority_queue, (new_cost, new_state))
+                else:
+                    stats.duplicates += 1
+            stats.update_frontier(len(priority_queue))
+        else:
+            if trace:
+                trace.message("No solution found")
+            return None
+
+    with stats.phase('path'):
+        return level.solution(came_from, current, key), current_cost
+
+def heuristic(state, targets):
+    """
+    Admissible lower bound on the number of moves left from a GameState; see
+    DistanceTables.heuristic.
+    """
+    board = state.board
+    level = PackedLevel(board.n, board.m, targets)
+    packed = level.pack(board)
+    return DistanceTables(level, packed).heuristic(packed)
+
+
+def packed_heuristic(level, state):
+    """
+    Manhattan distance of every piece to its closest target, from a packed
+    state. Not a lower bound (one move can shift several pieces), but it
+    guides the greedy hill climbing.
+    """
+    total_distance = 0
+    for piece in level.pieces(state):
+        row, col = piece.position
+        distances = [abs(row - target[0]) + abs(col - target[1]) for target in level.targets]
+        if distances:
+            total_distance += min(distances)
+    return total_distance
+
+
+def _distance_tables(level, start, pattern_db, known):
+    if pattern_db is not None and not pattern_db.matches(level, start):
+        raise ValueError("The pattern database was built for another level family")
+    return DistanceTables(level, start, pattern_db, known)
+
+
+def ida_star_solver(initial_state, memory_limit=64 * 1024 * 1024, symmetry=True, pattern_db=None, known=None, stats=None,
+                    trace=None):
+    """
+    Iterative deepening A* with the same heuristic as a_star_solver. Only the
+    current path is kept, plus a transposition table sized to take about
+    memory_limit bytes (keys and values included) that remembers the
+    smallest g each state was reached with in the current iteration; a state
+    reached again with no smaller g is skipped. Evicted entries only cost
+    re-expansions, so solutions stay optimal.
+    pattern_db is an optional PatternDatabase of the level's family, and
+    known optional exact distances from the solution cache.
+    """
+    stats = stats if stats is not None else SearchStats()
+    with stats.phase('setup'):
+        level, start = PackedLevel.from_board(initial_state.board)
+        tables = _distance_tables(level, start, pattern_db, known)
+        table = TranspositionTable(memory_limit=memory_limit, key_bits=3 * level.size)
+        key = canonical_key(level) if symmetry else None
+    moves = []
+    on_path = {key(start) if key else start}
+
+    def search(state, g, bound, iteration):
+        # Returns the solution flag, or the smallest f above the bound
+        f = g + tables.heuristic(state)
+        if f > bound:
+            return f
+        stats.nodes_expanded += 1
+        stats.update_depth(g)
+        if trace:
+            trace.expand(level, state)
+        if level.is_final_state(state):
+            return True
+        table.put(key(state) if key else state, (iteration, g))
+        # Besides the path, the table is all IDA* keeps
+        stats.update_frontier(len(table))
+        next_bound = INFINITY
+        for move, new_state in level.children(state):
+            stats.nodes_generated += 1
+            new_key = key(new_state) if key else new_state
+            seen = table.get(new_key)
+            is_new = new_key not in on_path and (seen is None or seen[0] != iteration or seen[1] > g + 1)
+            if trace:
+                trace.generate(level, state, move, new_state, is_new)
+            if not is_new:
+                stats.duplicates += 1
+                continue
+            moves.append((state, move))
+            on_path.add(new_key)
+            result = search(new_state, g + 1, bound, iteration)
+            if result is True:
+                return True
+            moves.pop()
+            on_path.discard(new_key)
+            next_bound = min(next_bound, result)
+        return next_bound
+
+    with stats.phase('search'):
+        bound = tables.heuristic(start)
+        iteration = 0
+        while bound != INFINITY:
+            if trace:
+                trace.message(f"f bound {bound}")
+            result = search(start, 0, bound, iteration)
+            if result is True:
+                break
+            bound = result
+            iteration += 1
+        else:
+            return None
+
+    with stats.phase('path'):
+        return [level.format_move(state, move) for state, move in moves]
+
+
+def hill_climbing_solver(initial_state, prune=True, stats=None, trace=None):
+    stats = stats if stats is not None else SearchStats()
+    with stats.phase('setup'):
+        level, current = PackedLevel.from_board(initial_state.board)
+        tables = DistanceTables(level, current) if prune else None
+    visited_states = set()
+    solution_moves = []
+
+    with stats.phase('search'):
+        while not level.is_final_state(current):
+            visited_states.add(current)
+            stats.nodes_expanded += 1
+            if trace:
+                trace.expand(level, current)
+
+            moves = []
+            for move, new_state in level.children(current):
+                stats.nodes_generated += 1
+                if tables and tables.is_dead(new_state):
+                    stats.pruned += 1
+                    continue
+                is_new = new_state not in visited_states
+                if trace:
+                    trace.generate(level, current, move, new_state, is_new)
+                if is_new:
+                    heuristic_score = packed_heuristic(level, new_state)
+                    moves.append((heuristic_score, move, new_state))
+                else:
+                    stats.duplicates += 1
+
+            stats.update_frontier(len(moves))
+            stats.update_depth(len(solution_moves))
+            if not moves:
+                return None, solution_moves
+
+            # Select the best move (lowest heuristic score, first one on ties)
+            _, move, new_state = min(moves, key=lambda x: x[0])
+
+            solution_moves.append(level.format_move(current, move))
+            current = new_state
+
+    return GameState(level.to_board(current)), solution_moves
+
+
+def beam_search_solver(initial_state, width=64, time_limit=5.0, restarts=True, patience=10, max_depth=None, seed=None,
+                       stats=None, trace=None):
+    """
+    Anytime local search. Each run is a beam search that keeps the `width`
+    children of a layer with the lowest DistanceTables.estimate; runs after
+    the first break ties (and near ties) at random, and only look for
+    solutions shorter than the best one so far. Runs are restarted until
+    time_limit seconds have passed, a solution is found within one move of
+    the heuristic's lower bound, `patience` runs in a row after the first
+    solution find nothing shorter, or after one run when restarts is False.
+    Returns the best move list found, or None if none was found in time.
+    """
+    stats = stats if stats is not None else SearchStats()
+    with stats.phase('setup'):
+        level, start = PackedLevel.from_board(initial_state.board)
+        tables = DistanceTables(level, start)
+        rng = random.Random(seed)
+        deadline = time.perf_counter() + time_limit
+        max_depth = max_depth or 4 * level.size
+        lower_bound = tables.heuristic(start)
+    if tables.is_dead(start):
+        return None
+    if level.is_final_state(start):
+        return []
+    best = None
+
+    with stats.phase('search'):
+        run = 0
+        stale = 0
+        while time.perf_counter() < deadline:
+            limit = len(best) - 1 if best else max_depth
+            came_from = {start: None}
+            beam = [start]
+            goal = None
+            depth = 0
+            while beam and goal is None and depth < limit and time.perf_counter() < deadline:
+                depth += 1
+                candidates = []
+                for state in beam:
+                    stats.nodes_expanded += 1
+                    if trace:
+                        trace.expand(level, state)
+                    for move, new_state in level.children(state):
+                        stats.nodes_generated += 1
+                        is_new = new_state not in came_from
+                        if trace:
+                            trace.generate(level, state, move, new_state, is_new)
+                        if not is_new:
+                            stats.duplicates += 1
+                            continue
+                        if tables.is_dead(new_state):
+                            stats.pruned += 1
+                            continue
+                        came_from[new_state] = (state, move)
+                        if level.is_final_state(new_state):
+                            goal = new_state
+                            break
+                        score = tables.estimate(new_state)
+                        candidates.append((score + rng.random() if run else score, new_state))
+                    if goal is not None:
+                        break
+                beam = [state for _, state in heapq.nsmallest(width, candidates)]
+                stats.update_depth(depth)
+                stats.update_frontier(len(beam))
+            if goal is not None:
+                best = level.solution(came_from, goal)
+                stats.report_solution(best)
+                stale = 0
+                if trace:
+                    trace.message(f"Run {run}: solution of length {len(best)}")
+            elif best is not None:
+                stale += 1
+            run += 1
+            if not restarts or (best is not None and (len(best) <= lower_bound + 1 or stale >= patience)):
+                break
+    return best
+
+
+def a_star_solver(initial_state, symmetry=True, pattern_db=None, known=None, stats=None, trace=None):
+    """
+    A* with the matching heuristic of DistanceTables. Ties on f are broken
+    towards the larger g, stale queue entries are skipped on pop, and a state
+    reached again with a smaller g is reopened, so the solution is optimal.
+    pattern_db is an optional PatternDatabase of the level's family, which
+    strengthens the heuristic, and known optional exact distances from the
+    solution cache (SolutionCache.known_distances), which replace it.
+    """
+    stats = stats if stats is not None else SearchStats()
+    with stats.phase('setup'):
+        level, start = PackedLevel.from_board(initial_state.board)
+        tables = _distance_tables(level, start, pattern_db, known)
+        key = canonical_key(level) if symmetry else None
+    start_key = key(start) if key else start
+    start_h = tables.heuristic(start)
+    if start_h == INFINITY:
+        return None
+    open_set = [(start_h, 0, start)]  # (f_score, -g_score, state)
+    came_from = {start_key: None}
+    g_score = {start_key: 0}
+    closed_set = set()
+
+    with stats.phase('search'):
+        while open_set:
+            _, neg_g, current = heapq.heappop(open_set)
+            current_g = -neg_g
+            current_key = key(current) if key else current
+            if current_g > g_score[current_key] or current_key in closed_set:
+                # Stale entry: the state was pushed again with a smaller g
+                continue
+            stats.nodes_expanded += 1
+            stats.update_depth(current_g)
+            if trace:
+                trace.expand(level, current)
+
+            if level.is_final_state(current):
+                break
+
+            closed_set.add(current_key)
+            new_g = current_g + 1  # Each move costs 1
+
+            for move, new_state in level.children(current):
+                stats.nodes_generated += 1
+                new_key = key(new_state) if key else new_state
+                is_new = new_g < g_score.get(new_key, INFINITY)
+                if trace:
+                    trace.generate(level, current, move, new_state, is_new)
+                if not is_new:
+                    stats.duplicates += 1
+                    continue
+                h = tables.heuristic(new_state)
+                if h == INFINITY:
+                    stats.pruned += 1
+                    continue
+                # Reopen the state if it had already been expanded with a larger g
+                closed_set.discard(new_key)
+                g_score[new_key] = new_g
+                came_from[new_key] = (current, move)
+                heapq.heappush(open_set, (new_g + h, -new_g, new_state))
+            stats.update_frontier(len(open_set))
+        else:
+            return None
+
+    with stats.phase('path'):
+        return level.solution(came_from, current, key)
+
+
+def _ucs_moves(initial_state, **kwargs):
+    result = ucs_solver(initial_state, **kwargs)
+    return result[0] if result else None
+
+
+def _hill_climbing_moves(initial_state, **kwargs):
+    solution_state, moves = hill_climbing_solver(initial_state, **kwargs)
+    if solution_state and solution_state.is_final_state():
+        return moves
+    return None
+
+
+# Every solver by name, all returning the move list or None
+SOLVERS = {
+    'bfs': bfs_solver,
+    'pbfs': parallel_bfs_solver,
+    'ebfs': external_bfs_solver,
+    'npbfs': numpy_bfs_solver,
+    'dfs': dfs_solver,
+    'iddfs': iddfs_solver,
+    'ucs': _ucs_moves,
+    'hill': _hill_climbing_moves,
+    'beam': beam_search_solver,
+    'astar': a_star_solver,
+    'idastar': ida_star_solver,
+}
+
+# Solvers whose solutions are always shortest
+OPTIMAL_SOLVERS = {'bfs', 'pbfs', 'ebfs', 'npbfs', 'iddfs', 'ucs', 'astar', 'idastar'}
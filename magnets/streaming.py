@@ -0,0 +1,136 @@
+# magnets/streaming.py
+import os
+import queue
+import threading
+import time
+
+from .board import GameState
+from .instrumentation import SearchCancelled, SearchLimitExceeded, SearchStats
+from .solvers import SOLVERS
+
+# Solvers that keep improving a solution until their time budget runs out
+ANYTIME_SOLVERS = {'beam'}
+
+
+def solve_iter(board, solver='bfs', node_budget=None, time_budget=None, memory_budget=None, interval=0.1,
+               cancel=None, stats=None, **options):
+    """
+    Run SOLVERS[solver] on a Board in a background thread and yield dicts
+    describing the search as it goes:
+
+    - {'event': 'progress', ...} every `interval` seconds, with the elapsed
+      time, nodes expanded and generated, nodes per second, frontier size
+      and depth;
+    - {'event': 'solution', 'moves': [...], 'length': n} for each better
+      solution an anytime solver finds;
+    - last, {'event': 'done', 'status': ..., 'moves': ..., 'length': ...,
+      'reason': ..., 'stats': {...}} with status 'solved', 'unsolved',
+      'limit' (a budget ran out; moves is the best solution so far, if any)
+      or 'cancelled' (the `cancel` event was set).
+
+    node_budget caps the nodes expanded, time_budget the seconds (an anytime
+    solver gets it as its own time limit and returns its best solution), and
+    memory_budget the bytes the process may grow by (ignored where memory use
+    can not be measured). Closing the generator, e.g. by breaking out of a
+    for loop over it, stops the search.
+    """
+    stats = stats if stats is not None else SearchStats()
+    stats.cancel = threading.Event()
+    stats.node_limit = node_budget
+    if time_budget is not None:
+        if solver in ANYTIME_SOLVERS:
+            options['time_limit'] = time_budget
+        else:
+            stats.deadline = time.perf_counter() + time_budget
+    solutions = queue.Queue()
+    stats.on_solution = solutions.put
+    outcome = {}
+
+    def run():
+        try:
+            outcome['moves'] = SOLVERS[solver](GameState(board.copy()), stats=stats, **options)
+        except SearchLimitExceeded as e:
+            outcome['limit'] = str(e)
+        except SearchCancelled:
+            pass
+        except Exception as e:
+            outcome['error'] = e
+
+    start = time.perf_counter()
+    base_memory = _memory_in_use() if memory_budget is not None else None
+    best = None
+    reason = None
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    try:
+        while thread.is_alive():
+            thread.join(interval)
+            while not solutions.empty():
+                best = solutions.get()
+                yield {'event': 'solution', 'moves': best, 'length': len(best)}
+            if cancel is not None and cancel.is_set():
+                stats.cancel.set()
+            if base_memory is not None and reason is None:
+                memory = _memory_in_use()
+                if memory is not None and memory - base_memory > memory_budget:
+                    reason = f"memory budget of {memory_budget} bytes reached"
+                    stats.cancel.set()
+            if thread.is_alive():
+                yield _progress(stats, time.perf_counter() - start)
+    finally:
+        # Also reached when the consumer closes the generator early
+        stats.cancel.set()
+        thread.join()
+
+    if 'error' in outcome:
+        raise outcome['error']
+    if 'moves' in outcome:
+        moves = outcome['moves']
+        status = 'solved' if moves is not None else 'unsolved'
+    else:
+        moves = best
+        reason = outcome.get('limit', reason)
+        status = 'limit' if reason else 'cancelled'
+    yield {
+        'event': 'done',
+        'status': status,
+        'moves': moves,
+        'length': len(moves) if moves is not None else None,
+        'reason': reason,
+        'time': time.perf_counter() - start,
+        'stats': stats.as_dict(),
+    }
+
+
+def solve_with_budget(board, solver='bfs', **kwargs):
+    # Drive solve_iter to the end and return its 'done' event
+    for event in solve_iter(board, solver, **kwargs):
+        if event['event'] == 'done':
+            return event
+
+
+def _progress(stats, elapsed):
+    return {
+        'event': 'progress',
+        'elapsed': elapsed,
+        'nodes_expanded': stats.nodes_expanded,
+        'nodes_generated': stats.nodes_generated,
+        'nodes_per_second': stats.nodes_expanded / elapsed if elapsed > 0 else 0.0,
+        'frontier': stats.frontier,
+        'depth': stats.depth,
+    }
+
+
+def _memory_in_use():
+    # Resident set size in bytes; the peak where /proc is not available, and
+    # None where neither is (Windows), which turns the memory budget off
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
@@ -0,0 +1,82 @@
+# magnets/symmetry.py
+
+
+class Symmetry:
+    """
+    The reflections and rotations of the board that map the targets onto
+    themselves. Pulling and pushing treat the four directions alike, so if a
+    transform maps a state to another one, it maps their moves and solutions
+    too, and the solvers only need to visit one state of each group: the one
+    with the smallest packed int (canonical).
+    """
+
+    def __init__(self, level):
+        self.level = level
+        self.transforms = []
+        for transform in self._board_transforms():
+            permutation = [level.cell(*transform(*level.position(cell))) for cell in range(level.size)]
+            targets = {level.cell(row, col) for row, col in level.targets}
+            if {permutation[cell] for cell in targets} == targets:
+                self.transforms.append(permutation)
+        # Per transform, the image of each byte of a packed state
+        self.tables = [self._byte_tables(permutation) for permutation in self.transforms[1:]]
+
+    def __len__(self):
+        return len(self.transforms)
+
+    def _board_transforms(self):
+        n, m = self.level.n, self.level.m
+        transforms = [
+            lambda row, col: (row, col),
+            lambda row, col: (row, m - 1 - col),
+            lambda row, col: (n - 1 - row, col),
+            lambda row, col: (n - 1 - row, m - 1 - col),
+        ]
+        if n == m:
+            transforms += [
+                lambda row, col: (col, row),
+                lambda row, col: (m - 1 - col, n - 1 - row),
+                lambda row, col: (col, n - 1 - row),
+                lambda row, col: (m - 1 - col, row),
+            ]
+        return transforms
+
+    def _byte_tables(self, permutation):
+        size = self.level.size
+        tables = []
+        for shift in range(0, 3 * size, 8):
+            table = []
+            for byte in range(256):
+                image = 0
+                for bit in range(8):
+                    index = shift + bit
+                    if byte >> bit & 1 and index < 3 * size:
+                        piece_type, cell = divmod(index, size)
+                        image |= 1 << (piece_type * size + permutation[cell])
+                table.append(image)
+            tables.append(table)
+        return tables
+
+    def transform(self, tables, state):
+        image = 0
+        for table in tables:
+            image |= table[state & 255]
+            state >>= 8
+        return image
+
+    def canonical(self, state):
+        best = state
+        for tables in self.tables:
+            image = self.transform(tables, state)
+            if image < best:
+                best = image
+        return best
+
+
+def canonical_key(level):
+    """
+    The function the solvers key their visited states with: Symmetry.canonical
+    when the level has symmetries, None (use the states themselves) otherwise.
+    """
+    symmetry = Symmetry(level)
+    return symmetry.canonical if len(symmetry) > 1 else None
@@ -0,0 +1,59 @@
+# magnets/transposition.py
+import sys
+from collections import OrderedDict
+
+# Dict and OrderedDict bookkeeping per entry (hash slot, entry, list node),
+# at its worst just after the table grows, when old and new slots coexist
+SLOT_SIZE = 136
+
+
+def entry_size(key_bits):
+    # Bytes per entry for keys of up to key_bits bits and (iteration, g) values
+    return SLOT_SIZE + sys.getsizeof((1 << key_bits) - 1) + sys.getsizeof((0, 0))
+
+
+class TranspositionTable:
+    """
+    State -> value map holding at most max_entries entries. When it is full,
+    the least recently used entry is evicted, so a search using it stays
+    within a fixed memory budget. Give either max_entries or memory_limit
+    (in bytes); with memory_limit, max_entries is how many entries of
+    key_bits-bit keys (3 * cells for packed states) fit in it, so the table
+    and its keys and values take at most about memory_limit bytes.
+    """
+
+    def __init__(self, max_entries=None, memory_limit=None, key_bits=64):
+        if max_entries is None:
+            if memory_limit is None:
+                raise ValueError("Give max_entries or memory_limit")
+            max_entries = memory_limit // entry_size(key_bits)
+        if max_entries < 1:
+            raise ValueError("The transposition table needs room for at least one entry")
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get(self, key, default=None):
+        value = self.entries.get(key, default)
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+        return value
+
+    def put(self, key, value):
+        if key in self.entries:
+            self.entries.move_to_end(key)
+        elif len(self.entries) >= self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+        self.entries[key] = value
+
+    def clear(self):
+        self.entries.clear()
@@ -0,0 +1,136 @@
+# magnets/vectorized.py
+try:
+    import numpy as np
+except ImportError:  # optional: only numpy_bfs_solver needs it
+    np = None
+
+from .heuristics import DistanceTables
+from .instrumentation import SearchStats
+from .packed import PackedLevel
+
+RED, PURPLE, GRAY = range(3)
+
+
+def numpy_bfs_solver(initial_state, stats=None, trace=None):
+    """
+    BFS that holds each layer as a NumPy array of states, one row per state
+    with a uint64 bitboard per piece type (the columns of a packed state),
+    and expands the whole layer at once. Moves are grouped by the landing
+    cell and the magnet type: every row with that cell free and such a magnet
+    on a given source cell gets one child, and the pull or push shifts of the
+    landing cell are then applied to the whole group in the same order as
+    Board._pull_magnets and Board._push_magnets. Children are deduplicated
+    with np.unique and dropped when already in the sorted visited array.
+
+    Needs NumPy and boards of at most 64 cells.
+    """
+    if np is None:
+        raise ImportError("numpy_bfs_solver needs NumPy (pip install numpy)")
+    stats = stats if stats is not None else SearchStats()
+    with stats.phase('setup'):
+        level, start = PackedLevel.from_board(initial_state.board)
+        if level.size > 64:
+            raise ValueError("numpy_bfs_solver handles boards of at most 64 cells")
+        tables = DistanceTables(level, start)
+        bit = [np.uint64(1 << cell) for cell in range(level.size)]
+        off_targets = np.uint64(level.full & ~level.targets_mask)
+        dead_cells = np.uint64(tables.dead_cells)
+        layer = np.array([level.unpack(start)], dtype=np.uint64)
+        # Per layer: the states, and for each the parent's row in the layer before and the move
+        layers = [(layer, None, None)]
+        visited = np.sort(_rows(layer))
+    if tables.is_dead(start):
+        return None
+
+    with stats.phase('search'):
+        while True:
+            occupied = layer[:, RED] | layer[:, PURPLE] | layer[:, GRAY]
+            goals = np.flatnonzero((occupied & off_targets) == 0)
+            if goals.size:
+                break
+            stats.nodes_expanded += len(layer)
+            free = [(occupied & bit[cell]) == 0 for cell in range(level.size)]
+            children, parents, moves = [], [], []
+            for kind, shift_table in ((RED, level.pull_shifts), (PURPLE, level.push_shifts)):
+                on_cell = [(layer[:, kind] & bit[cell]) != 0 for cell in range(level.size)]
+                sources = [cell for cell in range(level.size) if on_cell[cell].any()]
+                for dst in range(level.size):
+                    group, group_parents, group_moves = [], [], []
+                    for src in sources:
+                        rows = np.flatnonzero(on_cell[src] & free[dst])
+                        if not rows.size:
+                            continue
+                        batch = layer[rows]
+                        batch[:, kind] ^= bit[src] | bit[dst]
+                        group.append(batch)
+                        group_parents.append(rows)
+                        group_moves.append(np.full(rows.size, src * level.size + dst, dtype=np.int64))
+                    if group:
+                        batch = np.concatenate(group)
+                        _apply_shifts(batch, shift_table[dst], bit)
+                        children.append(batch)
+                        parents.extend(group_parents)
+                        moves.extend(group_moves)
+            if not children:
+                if trace:
+                    trace.message("No solution found")
+                return None
+            children = np.concatenate(children)
+            parents = np.concatenate(parents)
+            moves = np.concatenate(moves)
+            stats.nodes_generated += len(children)
+
+            alive = (children[:, GRAY] & dead_cells) == 0
+            stats.pruned += int(len(children) - alive.sum())
+            children, parents, moves = children[alive], parents[alive], moves[alive]
+            keys, first = np.unique(_rows(children), return_index=True)
+            new = ~np.isin(keys, visited)
+            first = first[new]
+            stats.duplicates += len(children) - len(first)
+            if not first.size:
+                if trace:
+                    trace.message("No solution found")
+                return None
+
+            layer = children[first]
+            layers.append((layer, parents[first], moves[first]))
+            visited = np.sort(np.concatenate((visited, keys[new])))
+            stats.update_depth(len(layers) - 1)
+            stats.update_frontier(len(layer))
+            if trace:
+                trace.message(f"Layer {len(layers) - 1}: {len(layer)} states")
+
+    with stats.phase('path'):
+        path = []
+        row = goals[0]
+        for depth in range(len(layers) - 1, 0, -1):
+            _, parent_rows, layer_moves = layers[depth]
+            parent_row = parent_rows[row]
+            parent = _pack(level, layers[depth - 1][0][parent_row])
+            path.append(level.format_move(parent, int(layer_moves[row])))
+            row = parent_row
+        return list(reversed(path))
+
+
+def _apply_shifts(batch, shifts, bit):
+    # One vectorized step per (from, to) shift, in order, on every row at once
+    occupied = batch[:, RED] | batch[:, PURPLE] | batch[:, GRAY]
+    zero = np.uint64(0)
+    for frm, to in shifts:
+        moving = ((occupied & bit[frm]) != 0) & ((occupied & bit[to]) == 0)
+        if not moving.any():
+            continue
+        step = np.where(moving, bit[frm] | bit[to], zero)
+        occupied ^= step
+        for kind in (RED, PURPLE, GRAY):
+            batch[:, kind] ^= np.where((batch[:, kind] & bit[frm]) != 0, step, zero)
+
+
+def _rows(states):
+    # Each row as one opaque 24-byte value, so rows can be sorted and compared
+    return np.ascontiguousarray(states).view(np.dtype((np.void, states.dtype.itemsize * 3))).ravel()
+
+
+def _pack(level, row):
+    red, purple, gray = (int(value) for value in row)
+    return red | (purple << level.size) | (gray << (2 * level.size))